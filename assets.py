@@ -0,0 +1,216 @@
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+# Owns every loaded image and every scaled/rotated/faded variant made from
+# them. Variants are keyed by (asset, size, rotation, alpha) and shared by
+# everything that draws them, so nothing rescales an image at spawn time.
+# Variants baked at startup are pinned; anything else requested on the fly
+# lives in a bounded LRU and is evicted when it goes unused.
+
+DEFAULT_MAX_VARIANTS = 256
+
+
+class AssetManager:
+    def __init__(self, max_variants=DEFAULT_MAX_VARIANTS):
+        self.max_variants = max_variants
+        self._images = {}
+        self._pinned = {}
+        self._variants = OrderedDict()
+        self._frames = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, name, path, alpha=True):
+        return self.add(name, pygame.image.load(path), alpha)
+
+    def add(self, name, image, alpha=True):
+        # Take ownership of an already decoded image (e.g. from a loader thread)
+        # convert() needs a display mode; keep the raw image when headless
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if alpha else image.convert()
+        self._images[name] = image
+        return image
+
+    def image(self, name):
+        return self._images[name]
+
+    def _bake(self, name, size, rotation, alpha):
+        surface = self._images[name]
+        if size is not None and size != surface.get_size():
+            surface = pygame.transform.scale(surface, size)
+        if rotation:
+            surface = pygame.transform.rotate(surface, rotation)
+        if alpha != 255:
+            surface = surface.copy()
+            surface.set_alpha(alpha)
+        return surface
+
+    def prebake(self, name, size=None, rotation=0, alpha=255):
+        # Build a variant now and keep it for the life of the manager
+        key = (name, size, rotation, alpha)
+        surface = self._pinned.get(key)
+        if surface is None:
+            surface = self._variants.pop(key, None) or self._bake(name, size, rotation, alpha)
+            self._pinned[key] = surface
+        return surface
+
+    def get(self, name, size=None, rotation=0, alpha=255):
+        key = (name, size, rotation, alpha)
+        surface = self._pinned.get(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+
+        surface = self._variants.get(key)
+        if surface is not None:
+            self._variants.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = self._bake(name, size, rotation, alpha)
+        self._variants[key] = surface
+        if len(self._variants) > self.max_variants:
+            self._variants.popitem(last=False)  # Least recently used
+        return surface
+
+    def frames(self, name, sizes, steps, round=False):
+        # Pre-rotated animation frames of `name` at each of `sizes`, built
+        # once and kept for the life of the manager
+        key = (name, tuple(sizes), steps, round)
+        frames = self._frames.get(key)
+        if frames is None:
+            frames = RotationFrames(self._images[name], sizes, steps, round)
+            self._frames[key] = frames
+        return frames
+
+    def stats(self):
+        return {
+            'images': len(self._images),
+            'pinned': len(self._pinned),
+            'frames': sum(len(frames.frames) for frames in self._frames.values()),
+            'variants': len(self._variants),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+def clip_circle(image):
+    # Copy of `image` made transparent outside its inscribed circle
+    width, height = image.get_size()
+    clipped = pygame.Surface((width, height), pygame.SRCALPHA)
+    clipped.blit(image, (0, 0))
+    mask = pygame.Surface((width, height), pygame.SRCALPHA)
+    pygame.draw.ellipse(mask, (255, 255, 255, 255), mask.get_rect())
+    clipped.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+    return clipped
+
+
+class RotationFrames:
+    # One image scaled to each of `sizes` and rotated through `steps` evenly
+    # spaced angles. Frame `size_index * steps + angle_index` is in `frames`;
+    # offset_x/offset_y hold the distance from each frame's top-left to the
+    # image's center, so a batch of sprites can be centered with array
+    # arithmetic before Surface.blits().
+    # `round` cuts the image to its inscribed circle first, for art drawn on
+    # an opaque square background that would otherwise spin with it.
+    def __init__(self, image, sizes, steps, round=False):
+        self.sizes = list(sizes)
+        self.steps = steps
+        self.frames = []
+        offset_x = []
+        offset_y = []
+        for size in self.sizes:
+            scaled = pygame.transform.smoothscale(image, size)
+            if round:
+                scaled = clip_circle(scaled)
+            for i in range(steps):
+                frame = pygame.transform.rotozoom(scaled, i * 360 / steps, 1)
+                # Trim the transparent corners rotating leaves, so blits and
+                # dirty rects only cover visible pixels
+                visible = frame.get_bounding_rect()
+                offset_x.append(frame.get_width() // 2 - visible.x)
+                offset_y.append(frame.get_height() // 2 - visible.y)
+                frame = frame.subsurface(visible).copy()
+                if pygame.display.get_surface() is not None:
+                    frame = frame.convert_alpha()  # Blits much faster in display format
+                self.frames.append(frame)
+        self.offset_x = np.array(offset_x, dtype=np.int32)
+        self.offset_y = np.array(offset_y, dtype=np.int32)
+
+    def index(self, size_index, angle_index):
+        # Frame numbers for arrays of size and angle indices (angles wrap)
+        return size_index * self.steps + angle_index % self.steps
+
+
+# Rendered text surfaces, keyed by (font, text, color, antialias). Menus
+# draw the same labels every frame, so after the first frame they are all
+# cache hits. `misses` counts actual font rasterizations.
+
+DEFAULT_MAX_TEXTS = 512
+
+
+class TextCache:
+    def __init__(self, max_entries=DEFAULT_MAX_TEXTS):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def rasterize(self, font, text, color, antialias=True):
+        # Render without caching, for text that changes often (see HudField)
+        self.misses += 1
+        return font.render(text, antialias, color)
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        surface = self.rasterize(font, text, color, antialias)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)  # Least recently used
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def stats(self):
+        return {
+            'entries': len(self._surfaces),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class HudField:
+    # A HUD label such as "Score: {}" that is only re-rendered when its value
+    # changes. Values don't go through the LRU so a climbing score can't push
+    # the static menu labels out of it.
+    def __init__(self, cache, font, color, template):
+        self.cache = cache
+        self.font = font
+        self.color = color
+        self.template = template
+        self.value = None
+        self.surface = None
+
+    def render(self, value):
+        if self.surface is None or value != self.value:
+            self.value = value
+            self.surface = self.cache.rasterize(self.font, self.template.format(value), self.color)
+        else:
+            self.cache.hits += 1
+        return self.surface
+
+    def draw(self, surface, value, x, y):
+        text_surface = self.render(value)
+        rect = text_surface.get_rect(center=(x, y))
+        surface.blit(text_surface, rect)
+        return rect
@@ -0,0 +1,100 @@
+import pygame
+
+# Sound effects and music kept decoded in memory and played on channels the
+# bank owns. Effects get their own pool of reserved channels with a cap on
+# how many copies of one effect can overlap; when the pool is full a new
+# effect takes over the channel of the lowest-priority, oldest effect, or is
+# dropped if everything playing matters more. Music tracks are decoded up
+# front too and played on a dedicated channel, so switching between the
+# start screen and gameplay music doesn't re-open and decode a stream.
+
+DEFAULT_FREQUENCY = 44100
+DEFAULT_BUFFER = 512  # Samples; smaller means lower latency but risks crackling
+SFX_CHANNELS = 6
+
+
+def init_mixer(frequency=DEFAULT_FREQUENCY, buffer=DEFAULT_BUFFER):
+    if not pygame.mixer.get_init():
+        pygame.mixer.init(frequency=frequency, size=-16, channels=2, buffer=buffer)
+
+
+class SoundBank:
+    def __init__(self, sfx_channels=SFX_CHANNELS):
+        # Channel 0 plays music, the next ones effects. Reserving them keeps
+        # any stray Sound.play() from grabbing one.
+        pygame.mixer.set_num_channels(1 + sfx_channels)
+        pygame.mixer.set_reserved(1 + sfx_channels)
+        self.music_channel = pygame.mixer.Channel(0)
+        self.channels = [pygame.mixer.Channel(i) for i in range(1, 1 + sfx_channels)]
+        self._voices = [None] * sfx_channels  # (effect name, priority, start order) per channel
+        self._started = 0
+        self.effects = {}
+        self.tracks = {}
+        self.current_track = None
+        self.music_volume = 1.0
+        self.sfx_volume = 1.0
+        self.stolen = 0
+        self.dropped = 0
+
+    def load_effect(self, name, path, priority=0, max_voices=2):
+        self.effects[name] = (pygame.mixer.Sound(path), priority, max_voices)
+
+    def load_track(self, name, path):
+        self.tracks[name] = pygame.mixer.Sound(path)
+
+    def _pick_channel(self, name, priority, max_voices):
+        # Returns the index of the channel to play on, or None to drop
+        busy = [channel.get_busy() for channel in self.channels]
+        same = [i for i, voice in enumerate(self._voices) if busy[i] and voice[0] == name]
+        if len(same) >= max_voices:
+            # Restart the oldest copy of this effect instead of stacking more
+            return min(same, key=lambda i: self._voices[i][2])
+        for i, is_busy in enumerate(busy):
+            if not is_busy:
+                return i
+        # All busy: steal from the lowest priority, oldest effect
+        victim = min(range(len(self.channels)), key=lambda i: (self._voices[i][1], self._voices[i][2]))
+        if self._voices[victim][1] > priority:
+            return None
+        self.stolen += 1
+        return victim
+
+    def play(self, name):
+        sound, priority, max_voices = self.effects[name]
+        i = self._pick_channel(name, priority, max_voices)
+        if i is None:
+            self.dropped += 1
+            return None
+        channel = self.channels[i]
+        channel.play(sound)
+        channel.set_volume(self.sfx_volume)
+        self._started += 1
+        self._voices[i] = (name, priority, self._started)
+        return channel
+
+    def set_sfx_volume(self, volume):
+        self.sfx_volume = volume
+        for channel in self.channels:
+            channel.set_volume(volume)
+
+    def play_music(self, name, fade_ms=0):
+        # Loops `name` on the music channel; no-op if it's already playing
+        if self.current_track == name and self.music_channel.get_busy():
+            return
+        self.music_channel.play(self.tracks[name], loops=-1, fade_ms=fade_ms)
+        self.music_channel.set_volume(self.music_volume)
+        self.current_track = name
+
+    def stop_music(self):
+        self.music_channel.stop()
+        self.current_track = None
+
+    def pause_music(self):
+        self.music_channel.pause()
+
+    def unpause_music(self):
+        self.music_channel.unpause()
+
+    def set_music_volume(self, volume):
+        self.music_volume = volume
+        self.music_channel.set_volume(volume)
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import threading
+
+from savefile import save_game
+from simulation import TICK_RATE, copy_state
+
+# Periodic background autosave. The game thread only takes a snapshot (a
+# copy of the player and the obstacle columns); encoding and the atomic
+# write happen on a worker thread, so gameplay never waits on the disk. If
+# the worker is still busy when the next snapshot arrives, the older
+# pending one is dropped -- only the newest state matters.
+#
+# Snapshots rotate through a ring of AUTOSAVE_SLOTS files in the saves
+# directory (autosave_1.sav ...), so the last few are kept for recovery and
+# show up in the load menu like any other save.
+#
+# close() doesn't wait either: the worker writes what is pending and then
+# stops by itself. It isn't a daemon thread, so quitting the game still
+# lets that last write finish.
+
+AUTOSAVE_INTERVAL = 10 * TICK_RATE  # Ticks between autosaves
+AUTOSAVE_SLOTS = 3
+
+
+class AutoSaver:
+    def __init__(self, directory='saves', slots=AUTOSAVE_SLOTS, interval=AUTOSAVE_INTERVAL,
+                 catalog=None):
+        self.directory = directory
+        self.catalog = catalog  # SaveCatalog to record each autosave in
+        self.slots = slots
+        self.interval = interval
+        self.saved = 0
+        self.dropped = 0
+        self.last_error = None
+        self._slot = self._oldest_slot()
+        self._pending = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="autosave")
+        self._thread.start()
+
+    def slot_path(self, slot):
+        return os.path.join(self.directory, f"autosave_{slot + 1}.sav")
+
+    def _oldest_slot(self):
+        # Start the ring at the stalest file so the newest snapshot from a
+        # previous run survives until this run has written a fresh one
+        def age(slot):
+            try:
+                return os.path.getmtime(self.slot_path(slot))
+            except OSError:
+                return float('-inf')
+        return min(range(self.slots), key=age)
+
+    def tick(self, state):
+        # Call once per simulation tick; snapshots every `interval` ticks
+        if state.frame % self.interval == 0 and not state.game_over:
+            self.submit(state)
+
+    def submit(self, state):
+        snapshot = copy_state(state)
+        with self._condition:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = snapshot
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                snapshot = self._pending
+                self._pending = None
+
+            path = self.slot_path(self._slot)
+            try:
+                if not os.path.exists(self.directory):
+                    os.makedirs(self.directory)
+                save_game(path, snapshot)
+                if self.catalog is not None:
+                    self.catalog.record(path, snapshot)
+            except (OSError, sqlite3.Error) as error:
+                self.last_error = error
+            else:
+                self.saved += 1
+                self._slot = (self._slot + 1) % self.slots
+
+    def close(self):
+        # Have the worker finish any pending write and stop; returns at once
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def wait(self, timeout=None):
+        # Block until a closed worker has stopped
+        self._thread.join(timeout)
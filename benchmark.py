@@ -0,0 +1,213 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+import statistics
+import subprocess
+
+# Reproducible benchmarks for the game loop and the I/O paths. Everything
+# runs under SDL's dummy video/audio drivers with fixed seeds, so numbers
+# are comparable between commits on the same machine:
+#
+#   python benchmark.py                              # writes bench_results.json
+#   python benchmark.py --baseline old.json          # fails on regressions
+#
+# Each metric is the median of several repeats.
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SEED = 1234
+OBSTACLE_COUNTS = (10, 100, 1000, 10000)
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_THRESHOLD = 0.15  # Allowed slowdown before a metric counts as a regression
+REPEATS = 5
+
+# Child process for the startup benchmark: time from interpreter start to
+# the first start screen frame being flipped.
+STARTUP_SCRIPT = """
+import sys, time, pygame
+def first_flip(*args):
+    print(time.time(), flush=True)
+    raise SystemExit
+pygame.display.flip = first_flip
+import main
+main.run()
+"""
+
+
+def metric(value, unit, higher_is_better):
+    return {'value': value, 'unit': unit, 'higher_is_better': higher_is_better}
+
+
+def median_of(repeats, run):
+    return statistics.median(run() for _ in range(repeats))
+
+
+def bench_frames(main, count, repeats):
+    # Full gameplay frames (step, draw, HUD, present) with `count` obstacles
+    import simulation
+    from renderer import DirtyRenderer
+    from assets import HudField
+
+    frames = max(30, min(600, 300000 // count))
+
+    def run():
+        rng = random.Random(SEED)
+        state = simulation.new_game(seed=SEED)
+        state.player.lives = simulation.INVULNERABLE_LIVES
+        renderer = DirtyRenderer(main.WIN, main.BACKGROUND_IMAGE, enabled=main.DIRTY_RENDERING)
+        score_field = HudField(main.TEXT_CACHE, main.INSTRUCTION_FONT, main.WHITE, "Score: {}")
+        lives_field = HudField(main.TEXT_CACHE, main.INSTRUCTION_FONT, main.WHITE, "Lives: {}")
+        start = time.perf_counter()
+        for _ in range(frames):
+            simulation.fill_obstacles(state, count, rng)
+            simulation.step(state, simulation.random_inputs(rng))
+            renderer.begin()
+            main.draw_game(renderer, state)
+            renderer.mark(score_field.draw(main.WIN, state.player.score, 80, 30))
+            renderer.mark(lives_field.draw(main.WIN, state.player.lives, main.WIDTH - 80, 30))
+            renderer.present()
+        return frames / (time.perf_counter() - start)
+
+    return median_of(repeats, run)
+
+
+def bench_startup(repeats):
+    def run():
+        start = time.time()
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+        return float(output.split()[-1]) - start
+
+    return median_of(repeats, run)
+
+
+def bench_save_load(count, extension, repeats):
+    # Save a large state to disk and load it again
+    import simulation
+    from savefile import load_game, save_game
+
+    state = simulation.new_game(seed=SEED)
+    simulation.fill_obstacles(state, count, random.Random(SEED))
+
+    def run():
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench" + extension)
+            start = time.perf_counter()
+            save_game(path, state)
+            load_game(path)
+            return time.perf_counter() - start
+
+    return median_of(repeats, run)
+
+
+def bench_particles(main, count, repeats, frames=300):
+    # Update and draw `count` debris particles per frame, respawning bursts
+    # as they burn out
+    import numpy as np
+    from particles import ParticleLayer, fade_sprites, DEBRIS_COLOR
+
+    def run():
+        rng = np.random.default_rng(SEED)
+        layer = ParticleLayer(fade_sprites(2, DEBRIS_COLOR), capacity=count)
+        start = time.perf_counter()
+        for _ in range(frames):
+            missing = count - len(layer)
+            if missing:
+                layer.burst(rng, missing, main.WIDTH / 2, main.HEIGHT / 2, 400, 2.0)
+            layer.update(1 / 60)
+            main.WIN.blit(main.BACKGROUND_IMAGE, (0, 0))
+            layer.draw(main.WIN)
+        return frames / (time.perf_counter() - start)
+
+    return median_of(repeats, run)
+
+
+def bench_draw_text(main, repeats, calls=20000):
+    labels = ["Start Game", "Load Game", "Quit", "Settings", "Resume", "Save Game"]
+
+    def run():
+        start = time.perf_counter()
+        for i in range(calls):
+            main.draw_text(labels[i % len(labels)], main.BUTTON_FONT, (0, 0, 0),
+                           main.WIN, main.WIDTH // 2, main.HEIGHT // 2)
+        return calls / (time.perf_counter() - start)
+
+    return median_of(repeats, run)
+
+
+def run_benchmarks(repeats=REPEATS):
+    random.seed(SEED)
+    metrics = {}
+    metrics['startup_seconds'] = metric(bench_startup(repeats), "s", False)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import main
+    main.wait_for_assets()
+
+    for count in OBSTACLE_COUNTS:
+        metrics[f'frames_per_sec_{count}'] = metric(bench_frames(main, count, repeats), "fps", True)
+    metrics['particle_frames_per_sec_10000'] = metric(bench_particles(main, 10000, repeats), "fps", True)
+    metrics['save_load_seconds_10000'] = metric(bench_save_load(10000, ".json", repeats), "s", False)
+    metrics['binary_save_load_seconds_10000'] = metric(bench_save_load(10000, ".sav", repeats), "s", False)
+    metrics['draw_text_calls_per_sec'] = metric(bench_draw_text(main, repeats), "calls/s", True)
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': SEED,
+        'repeats': repeats,
+        'metrics': metrics,
+    }
+
+
+def compare(results, baseline, threshold):
+    # Returns the names of metrics that got worse by more than `threshold`
+    regressions = []
+    for name, current in results['metrics'].items():
+        previous = baseline['metrics'].get(name)
+        if previous is None or not previous['value']:
+            continue
+        change = (current['value'] - previous['value']) / previous['value']
+        if not current['higher_is_better']:
+            change = -change
+        status = "REGRESSION" if change < -threshold else "ok"
+        print(f"{name:<32}{previous['value']:>14.4f}{current['value']:>14.4f}{change:>+9.1%}  {status}")
+        if status != "ok":
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark Space Dodge headless.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown per metric (default 0.15)")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="runs per metric")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.repeats)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed more than {args.threshold:.0%}")
+            sys.exit(1)
+    else:
+        for name, result in results['metrics'].items():
+            print(f"{name:<32}{result['value']:>14.4f} {result['unit']}")
@@ -0,0 +1,194 @@
+import os
+import json
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+# Gameplay capture for QA and replay review. Every captured frame is copied
+# straight out of the window surface's pixel buffer (a NumPy view of
+# Surface.get_buffer(), so one memcpy and no conversion) into one of a few
+# preallocated frame buffers, and the buffer is handed to a writer thread
+# through a bounded queue. Converting and writing happen on that thread.
+# When every buffer is still waiting to be written the frame is dropped
+# and counted; the game loop never waits for the disk, not even when the
+# capture is stopped: close() leaves flushing the queued frames and
+# writing the sidecar to a thread of its own.
+#
+# Formats:
+#   "raw"  one file of back-to-back frames in the surface's own 32-bit
+#          layout, plus a .json sidecar with the size, pixel format, frame
+#          numbers and times, and an ffmpeg command that turns it into a
+#          video. Cheapest to write.
+#   "png"  a directory of numbered PNGs; numbers skip the dropped frames.
+#          Encoded here rather than with pygame.image.save, which holds the
+#          GIL throughout; zlib lets go of it while compressing, so the
+#          game keeps running while the writer works.
+
+CAPTURE_BUFFERS = 8  # Frames that can wait for the writer
+CAPTURE_FORMATS = ("raw", "png")
+PNG_LEVEL = 1  # zlib level; higher barely shrinks game frames and costs a lot
+
+# 32-bit channel masks -> (ffmpeg -pix_fmt name, byte offsets of R, G, B)
+# in memory (little endian)
+PIXEL_FORMATS = {
+    (0xFF0000, 0xFF00, 0xFF): ("bgr0", [2, 1, 0]),
+    (0xFF, 0xFF00, 0xFF0000): ("rgb0", [0, 1, 2]),
+}
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(data, zlib.crc32(kind)))
+
+
+def encode_png(pixels, channels, rows, level=PNG_LEVEL):
+    # 8-bit RGB PNG of a (height, width) uint32 frame. `channels` are the
+    # byte offsets of R, G, B in a pixel; `rows` is a (height, 1 + 3 *
+    # width) uint8 scratch array whose first column is the filter byte (0).
+    height, width = pixels.shape
+    rows[:, 1:].reshape(height, width, 3)[...] = pixels.view(np.uint8).reshape(height, width, 4)[:, :, channels]
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)),
+        png_chunk(b"IDAT", zlib.compress(rows, level)),
+        png_chunk(b"IEND", b""),
+    ))
+
+
+class FrameCapture:
+    def __init__(self, surface, path, fmt="raw", buffers=CAPTURE_BUFFERS, fps=60):
+        if fmt not in CAPTURE_FORMATS:
+            raise ValueError(f"unknown capture format {fmt!r}")
+        if surface.get_bitsize() != 32 or tuple(surface.get_masks()[:3]) not in PIXEL_FORMATS:
+            raise ValueError("frame capture needs a 32-bit RGB surface")
+        self.surface = surface
+        self.path = path
+        self.format = fmt
+        self.fps = fps
+        self.size = surface.get_size()
+        self.pixel_format, self.channels = PIXEL_FORMATS[tuple(surface.get_masks()[:3])]
+        width, height = self.size
+        self.buffers = [np.empty((height, width), dtype=np.uint32) for _ in range(buffers)]
+        self._rows = np.zeros((height, 1 + 3 * width), dtype=np.uint8)  # PNG scratch
+        self.frames = 0  # Frames offered to capture()
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.write_seconds = 0.0
+        self.last_error = None
+        self._times = []  # (frame number, seconds since start) of every written frame
+        self._start = time.perf_counter()
+        self._free = queue.SimpleQueue()
+        for index in range(buffers):
+            self._free.put(index)
+        self._filled = queue.Queue(maxsize=buffers)
+        if fmt == "raw":
+            directory = os.path.dirname(path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            self._file = open(path, "wb")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._file = None
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+        self._closer = None
+
+    def capture(self):
+        # Grab the surface as it is now; call right after the frame is
+        # presented. Returns False if the frame had to be dropped.
+        self.frames += 1
+        try:
+            index = self._free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        width, height = self.size
+        pixels = self.surface.get_buffer()  # Locks the surface until released
+        try:
+            view = np.frombuffer(pixels, dtype=np.uint32).reshape(height, -1)
+            np.copyto(self.buffers[index], view[:, :width])
+        finally:
+            view = None
+            pixels = None
+        self.captured += 1
+        self._filled.put_nowait((index, self.frames, time.perf_counter() - self._start))
+        return True
+
+    def _run(self):
+        while True:
+            item = self._filled.get()
+            if item is None:
+                return
+            index, frame, seconds = item
+            start = time.perf_counter()
+            try:
+                self._write(self.buffers[index], frame)
+            except OSError as error:
+                self.last_error = error
+            else:
+                self.written += 1
+                self._times.append((frame, round(seconds, 4)))
+            self.write_seconds += time.perf_counter() - start
+            self._free.put(index)
+
+    def _write(self, pixels, frame):
+        if self._file is not None:
+            self._file.write(pixels.data)
+        else:
+            with open(os.path.join(self.path, f"frame_{frame:06d}.png"), "wb") as f:
+                f.write(encode_png(pixels, self.channels, self._rows))
+
+    def close(self, on_closed=None):
+        # Stop capturing without waiting: the frames already queued and the
+        # sidecar are written in the background, then on_closed(summary) is
+        # called from that thread (with a failure line instead if the file
+        # couldn't be finished). Not a daemon, so quitting the game still
+        # lets it finish.
+        if self._closer is None:
+            self._closer = threading.Thread(target=self._finish, args=(on_closed,), name="capture-close")
+            self._closer.start()
+
+    def wait(self):
+        # Block until a close() has finished writing everything
+        if self._closer is not None:
+            self._closer.join()
+
+    def _finish(self, on_closed):
+        self._filled.put(None)
+        self._thread.join()
+        try:
+            self._write_sidecar()
+        except OSError as error:
+            self.last_error = error
+            if on_closed is not None:
+                on_closed(f"Capture to {self.path} failed: {error}")
+            return
+        if on_closed is not None:
+            on_closed(self.summary())
+
+    def _write_sidecar(self):
+        # Raw captures only: close the video and describe it next to it
+        if self._file is not None:
+            self._file.close()
+            width, height = self.size
+            with open(self.path + ".json", "w") as f:
+                json.dump({
+                    "width": width,
+                    "height": height,
+                    "pixel_format": self.pixel_format,
+                    "fps": self.fps,
+                    "frames": self._times,
+                    "dropped": self.dropped,
+                    "ffmpeg": f"ffmpeg -f rawvideo -pix_fmt {self.pixel_format} -s {width}x{height} "
+                              f"-r {self.fps} -i {self.path} -pix_fmt yuv420p {os.path.splitext(self.path)[0]}.mp4",
+                }, f)
+
+    def summary(self):
+        average = self.write_seconds / self.written * 1000 if self.written else 0.0
+        return (f"{self.captured} of {self.frames} frames captured ({self.dropped} dropped), "
+                f"{self.written} written to {self.path}, {average:.2f} ms per frame on the writer"
+                + (f" (last error: {self.last_error})" if self.last_error is not None else ""))
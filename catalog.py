@@ -0,0 +1,201 @@
+import os
+import time
+import zlib
+import sqlite3
+
+import numpy as np
+
+from savefile import load_game
+from simulation import WIDTH, HEIGHT
+
+# SQLite index of the saves directory. Every save written by the game is
+# recorded here with its metadata (score, lives, obstacle count, time, file
+# size) and a small thumbnail of the playfield, so the load menu can page
+# through thousands of saves without opening any of them. Files that appear
+# in the directory some other way are picked up by refresh(), which only
+# reads the files that are new or changed since the last scan. Files that
+# can't be read as saves are left out; `python catalog.py` checks that.
+
+CATALOG_FILE = "catalog.db"
+SAVE_EXTENSIONS = ('.json', '.sav')
+SCHEMA_VERSION = 1
+INSERT_ROW = "INSERT OR REPLACE INTO saves VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+THUMBNAIL_SIZE = (80, 64)
+THUMBNAIL_BG = (10, 10, 30)
+THUMBNAIL_OBSTACLE = (190, 190, 190)
+THUMBNAIL_PLAYER = (255, 255, 0)
+
+
+def make_thumbnail(state):
+    # A tiny map of the playfield as zlib-compressed RGB bytes. Built with
+    # NumPy only, so it is safe to call from the autosave thread.
+    width, height = THUMBNAIL_SIZE
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[:] = THUMBNAIL_BG
+
+    centerx, centery = state.obstacles.centers()
+    visible = (centery >= 0) & (centery < HEIGHT)
+    xs = (centerx[visible] * width // WIDTH).clip(1, width - 2)
+    ys = (centery[visible] * height // HEIGHT).clip(1, height - 2)
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            pixels[ys + dy, xs + dx] = THUMBNAIL_OBSTACLE
+
+    player = state.player.rect
+    px = min(max(player.centerx * width // WIDTH, 2), width - 2)
+    py = min(max(player.centery * height // HEIGHT, 2), height - 2)
+    pixels[py - 2:py + 2, px - 2:px + 2] = THUMBNAIL_PLAYER
+    return zlib.compress(pixels.tobytes())
+
+
+def thumbnail_pixels(blob):
+    # Raw RGB bytes for pygame.image.frombytes(..., THUMBNAIL_SIZE, "RGB")
+    return zlib.decompress(blob)
+
+
+class SaveEntry:
+    def __init__(self, filename, score, lives, obstacles, saved_at, size):
+        self.filename = filename
+        self.score = score
+        self.lives = lives
+        self.obstacles = obstacles
+        self.saved_at = saved_at
+        self.size = size
+
+    @property
+    def name(self):
+        return os.path.splitext(self.filename)[0].replace("_", " ")
+
+
+class SaveCatalog:
+    def __init__(self, directory='saves'):
+        self.directory = directory
+        self.path = os.path.join(directory, CATALOG_FILE)
+
+    def _connect(self):
+        # A connection per call keeps this usable from the autosave thread
+        if not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        connection = sqlite3.connect(self.path, timeout=5)
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            connection.executescript(f"""
+                DROP TABLE IF EXISTS saves;
+                CREATE TABLE saves (
+                    filename TEXT PRIMARY KEY,
+                    score INTEGER,
+                    lives INTEGER,
+                    obstacles INTEGER,
+                    saved_at REAL,
+                    size INTEGER,
+                    thumbnail BLOB
+                );
+                CREATE INDEX saves_saved_at ON saves (saved_at);
+                PRAGMA user_version = {SCHEMA_VERSION};
+            """)
+        return connection
+
+    def _row(self, path, state, stat):
+        return (os.path.basename(path), state.player.score, state.player.lives,
+                len(state.obstacles), stat.st_mtime, stat.st_size, make_thumbnail(state))
+
+    def record(self, path, state):
+        # Call after writing `path` from `state`
+        with self._connect() as connection:
+            connection.execute(INSERT_ROW, self._row(path, state, os.stat(path)))
+        connection.close()
+
+    def refresh(self):
+        # Bring the index in line with the directory; returns the save count
+        if not os.path.exists(self.directory):
+            return 0
+        on_disk = {
+            entry.name: entry.stat()
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(SAVE_EXTENSIONS) and entry.is_file()
+        }
+        connection = self._connect()
+        indexed = {
+            filename: (saved_at, size)
+            for filename, saved_at, size in connection.execute(
+                "SELECT filename, saved_at, size FROM saves")
+        }
+        removed = [(filename,) for filename in indexed if filename not in on_disk]
+        added = []
+        for filename, stat in on_disk.items():
+            if indexed.get(filename) == (stat.st_mtime, stat.st_size):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                added.append(self._row(path, load_game(path), stat))
+            except (OSError, ValueError, KeyError, TypeError):
+                continue  # Not a readable save; leave it out of the menu
+        with connection:
+            connection.executemany("DELETE FROM saves WHERE filename = ?", removed)
+            connection.executemany(INSERT_ROW, added)
+        count = connection.execute("SELECT COUNT(*) FROM saves").fetchone()[0]
+        connection.close()
+        return count
+
+    def count(self):
+        connection = self._connect()
+        count = connection.execute("SELECT COUNT(*) FROM saves").fetchone()[0]
+        connection.close()
+        return count
+
+    def page(self, number, page_size):
+        # Newest first, without thumbnails
+        connection = self._connect()
+        rows = connection.execute(
+            "SELECT filename, score, lives, obstacles, saved_at, size FROM saves "
+            "ORDER BY saved_at DESC LIMIT ? OFFSET ?",
+            (page_size, number * page_size)
+        ).fetchall()
+        connection.close()
+        return [SaveEntry(*row) for row in rows]
+
+    def thumbnail(self, filename):
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT thumbnail FROM saves WHERE filename = ?", (filename,)
+        ).fetchone()
+        connection.close()
+        return thumbnail_pixels(row[0]) if row and row[0] else None
+
+
+def format_entry(entry):
+    size = f"{entry.size / 1024:.1f} KB" if entry.size >= 1024 else f"{entry.size} B"
+    saved_at = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.saved_at))
+    return f"Score {entry.score}  Lives {entry.lives}  {entry.obstacles} asteroids  {saved_at}  {size}"
+
+
+if __name__ == "__main__":
+    import json
+    import tempfile
+
+    from savefile import HEADER, save_game
+    from simulation import new_game
+
+    # Regression check: refresh() indexes the readable saves and leaves
+    # truncated, damaged and malformed ones out instead of raising
+    bad_files = {
+        "truncated.sav": b"SDSV\x01",
+        "damaged.sav": HEADER.pack(b"SDSV", 1, 1, 0, 0, 3, 0, 0, 5, 8) + b"not zlib",
+        "list.json": b"[]",
+        "number.json": b"42",
+        "player.json": json.dumps({"player": 5, "obstacles": []}).encode(),
+        "garbage.json": b"{not json",
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        state = new_game(seed=1)
+        save_game(os.path.join(directory, "good.sav"), state)
+        save_game(os.path.join(directory, "good.json"), state)
+        for filename, data in bad_files.items():
+            with open(os.path.join(directory, filename), "wb") as f:
+                f.write(data)
+        catalog = SaveCatalog(directory)
+        count = catalog.refresh()
+        indexed = sorted(entry.filename for entry in catalog.page(0, 100))
+        assert indexed == ["good.json", "good.sav"], indexed
+        assert catalog.refresh() == count == 2
+    print(f"refresh() indexed {count} saves and skipped {len(bad_files)} unreadable files")
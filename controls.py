@@ -0,0 +1,166 @@
+import time
+
+import pygame
+
+from simulation import Inputs
+
+# Input bindings and input-to-display latency measurement.
+#
+# Each action (left, right, up, down) has a list of bindings, written as
+# strings so they can live in settings.json:
+#   "key:<name>"     a keyboard key, by its pygame.key.name() ("left", "a")
+#   "button:<n>"     gamepad button n
+#   "axis:<n>+/-"    gamepad axis n pushed past the dead zone either way
+#   "hat:<dir>"      the first hat (d-pad) of a gamepad: left/right/up/down
+# Gamepad bindings match on any connected gamepad.
+#
+# InputMapper.sample() pumps the event queue and reads the keyboard and
+# gamepad state right then, so the game samples as late as it can: after
+# the frame cap's sleep and the frame's events, immediately before the
+# simulation ticks.
+#
+# LatencyProbe times every change of the sampled input until the first
+# frame that simulated it has been presented. SDL events carry no
+# timestamps here, so each change is known to have happened somewhere
+# between the previous poll and the one that saw it: the report gives the
+# latency from the poll that saw it ("seen") and from the one before
+# ("worst"), in ms and in frames.
+
+DEFAULT_BINDINGS = {
+    "left": ["key:left", "key:a", "hat:left", "axis:0-"],
+    "right": ["key:right", "key:d", "hat:right", "axis:0+"],
+    "up": ["key:up", "key:w", "hat:up", "axis:1-"],
+    "down": ["key:down", "key:s", "hat:down", "axis:1+"],
+}
+AXIS_DEADZONE = 0.35
+HAT_DIRECTIONS = {"left": (0, -1), "right": (0, 1), "up": (1, 1), "down": (1, -1)}
+
+LATENCY_SAMPLES = 10000  # Changes kept for the report
+
+
+def parse_binding(spec):
+    # "key:a" -> ("key", 97); raises ValueError on anything malformed
+    kind, _, value = spec.partition(":")
+    if kind == "key":
+        return ("key", pygame.key.key_code(value))
+    if kind == "button":
+        return ("button", int(value))
+    if kind == "axis" and value[-1:] in ("+", "-"):
+        return ("axis", int(value[:-1]), 1 if value[-1] == "+" else -1)
+    if kind == "hat" and value in HAT_DIRECTIONS:
+        return ("hat",) + HAT_DIRECTIONS[value]
+    raise ValueError(f"bad input binding {spec!r}")
+
+
+class InputMapper:
+    def __init__(self, bindings=DEFAULT_BINDINGS, deadzone=AXIS_DEADZONE):
+        self.bindings = [[parse_binding(spec) for spec in bindings.get(action, ())]
+                         for action in Inputs._fields]
+        self.deadzone = deadzone
+        self.joysticks = {}  # instance id -> pygame.joystick.Joystick
+        self.last_poll = None  # perf_counter() of the previous sample()
+
+    def refresh(self):
+        # Open every connected gamepad; hot-plugging during play goes
+        # through handle_event()
+        if not pygame.joystick.get_init():
+            pygame.joystick.init()
+        self.joysticks = {}
+        for index in range(pygame.joystick.get_count()):
+            joystick = pygame.joystick.Joystick(index)
+            self.joysticks[joystick.get_instance_id()] = joystick
+
+    def handle_event(self, event):
+        if event.type == pygame.JOYDEVICEADDED:
+            joystick = pygame.joystick.Joystick(event.device_index)
+            self.joysticks[joystick.get_instance_id()] = joystick
+        elif event.type == pygame.JOYDEVICEREMOVED:
+            self.joysticks.pop(event.instance_id, None)
+
+    def _active(self, binding, keys):
+        kind = binding[0]
+        if kind == "key":
+            return keys[binding[1]]
+        for joystick in self.joysticks.values():
+            if kind == "button":
+                if binding[1] < joystick.get_numbuttons() and joystick.get_button(binding[1]):
+                    return True
+            elif kind == "axis":
+                if binding[1] < joystick.get_numaxes() and joystick.get_axis(binding[1]) * binding[2] > self.deadzone:
+                    return True
+            elif joystick.get_numhats() and joystick.get_hat(0)[binding[1]] == binding[2]:
+                return True
+        return False
+
+    def sample(self):
+        # The current Inputs, from the freshest keyboard/gamepad state
+        pygame.event.pump()
+        self.last_poll = time.perf_counter()
+        keys = pygame.key.get_pressed()
+        return Inputs(*(any(self._active(binding, keys) for binding in bindings)
+                        for bindings in self.bindings))
+
+
+class LatencyProbe:
+    def __init__(self, max_samples=LATENCY_SAMPLES):
+        self.max_samples = max_samples
+        self.seen = []  # ms from the poll that saw a change to its frame on screen
+        self.worst = []  # ms from the poll before that
+        self.frame_times = []  # ms between presented frames
+        self._previous_inputs = None
+        self._previous_poll = None
+        self._pending = []  # (previous poll, seen) of changes not simulated yet
+        self._simulated = []  # ... simulated, waiting for the frame to be shown
+        self._last_present = None
+
+    def sampled(self, inputs, poll_time):
+        # Call with every sample; inputs that differ from the last sample
+        # are a change to time
+        if self._previous_inputs is not None and inputs != self._previous_inputs:
+            self._pending.append((self._previous_poll, poll_time))
+        self._previous_inputs = inputs
+        self._previous_poll = poll_time
+
+    def simulated(self):
+        # At least one tick ran with the latest sample
+        self._simulated.extend(self._pending)
+        self._pending.clear()
+
+    def presented(self):
+        # The frame was flipped to the screen
+        now = time.perf_counter()
+        if self._last_present is not None and len(self.frame_times) < self.max_samples:
+            self.frame_times.append((now - self._last_present) * 1000)
+        self._last_present = now
+        for previous_poll, seen in self._simulated:
+            if len(self.seen) < self.max_samples:
+                self.seen.append((now - seen) * 1000)
+                self.worst.append((now - previous_poll) * 1000)
+        self._simulated.clear()
+
+    def reset(self):
+        # Forget changes in flight and the frame timing (back from a pause)
+        self._pending.clear()
+        self._simulated.clear()
+        self._previous_inputs = None
+        self._last_present = None
+
+    def report(self):
+        if not self.seen:
+            return "No input changes measured."
+        frame = sorted(self.frame_times)[len(self.frame_times) // 2] if self.frame_times else 0.0
+        lines = [f"{len(self.seen)} input changes, median frame time {frame:.2f} ms"]
+        for name, values in (("seen", self.seen), ("worst", self.worst)):
+            values = sorted(values)
+            p50 = values[len(values) // 2]
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            line = f"{name:>5}: p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  max {values[-1]:6.2f} ms"
+            if frame:
+                within = sum(value <= frame for value in values) / len(values)
+                line += f"  = {p50 / frame:.2f} / {p95 / frame:.2f} frames, {within:.0%} within one frame"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            f.write(self.report() + "\n")
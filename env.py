@@ -0,0 +1,277 @@
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from replay import DECODED_INPUTS
+from simulation import (
+    WIDTH, HEIGHT, TICK_RATE, STARTING_LIVES, OBSTACLE_MAX_SPEED, new_game, step
+)
+
+# Gym-style environments for bots and balance testing. SpaceDodgeEnv wraps
+# the headless simulation with reset()/step() returning NumPy observations;
+# no window, clock or audio is involved. VectorEnv steps N of them per call,
+# split across worker processes that write observations, rewards and done
+# flags straight into one shared-memory block, so only a one-word command
+# per worker goes through a pipe each step.
+#
+# Actions are the replay input byte: a 0..15 bitmask of left (1), right (2),
+# up (4) and down (8).
+#
+# Observations are float32 vectors: player x, y (0..1), lives (1 = starting
+# lives) and how many of the observed slots are filled, followed by the
+# OBSERVED_OBSTACLES nearest obstacles as (present, dx, dy, speed), with
+# dx/dy relative to the player in screen fractions and speed in fractions of
+# the maximum. Empty slots are all zero.
+
+ACTIONS = len(DECODED_INPUTS)
+OBSERVED_OBSTACLES = 16
+OBSERVATION_SIZE = 4 + 4 * OBSERVED_OBSTACLES
+HIT_PENALTY = 10  # Reward lost per obstacle hit; each one dodged is worth 1
+
+
+class SpaceDodgeEnv:
+    def __init__(self, seed=None, lives=STARTING_LIVES, frame_skip=1, max_steps=None):
+        self.lives = lives
+        self.frame_skip = frame_skip  # Ticks each action is held for
+        self.max_steps = max_steps  # Truncate episodes after this many steps
+        self.rng = np.random.default_rng(seed)
+        self.state = None
+        self.steps = 0
+
+    def reset(self, seed=None, out=None):
+        # Returns (observation, info)
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.state = new_game(seed=int(self.rng.integers(2 ** 32)))
+        self.state.player.lives = self.lives
+        self.steps = 0
+        return self.observe(out), self.info()
+
+    def step(self, action, out=None):
+        # Returns (observation, reward, terminated, truncated, info)
+        state = self.state
+        inputs = DECODED_INPUTS[action]
+        score, lives = state.player.score, state.player.lives
+        for _ in range(self.frame_skip):
+            step(state, inputs)
+            if state.game_over:
+                break
+        self.steps += 1
+        reward = (state.player.score - score) - HIT_PENALTY * (lives - state.player.lives)
+        truncated = self.max_steps is not None and self.steps >= self.max_steps
+        return self.observe(out), float(reward), state.game_over, truncated, self.info()
+
+    def info(self):
+        player = self.state.player
+        return {"score": player.score, "lives": player.lives, "frame": self.state.frame}
+
+    def observe(self, out=None):
+        # Fills `out` (a float32 array of OBSERVATION_SIZE) if given
+        if out is None:
+            out = np.empty(OBSERVATION_SIZE, dtype=np.float32)
+        player = self.state.player
+        px, py = player.rect.center
+        centerx, centery = self.state.obstacles.centers()
+        dx = (centerx - px) / WIDTH
+        dy = (centery - py) / HEIGHT
+        distance = dx * dx + dy * dy
+        if len(distance) > OBSERVED_OBSTACLES:
+            nearest = np.argpartition(distance, OBSERVED_OBSTACLES)[:OBSERVED_OBSTACLES]
+            nearest = nearest[np.argsort(distance[nearest])]
+        else:
+            nearest = np.argsort(distance)
+        shown = len(nearest)
+
+        out[0] = px / WIDTH
+        out[1] = py / HEIGHT
+        out[2] = player.lives / STARTING_LIVES
+        out[3] = shown / OBSERVED_OBSTACLES
+        slots = out[4:].reshape(OBSERVED_OBSTACLES, 4)
+        slots[:shown, 0] = 1
+        slots[:shown, 1] = dx[nearest]
+        slots[:shown, 2] = dy[nearest]
+        slots[:shown, 3] = self.state.obstacles.speed[nearest] / OBSTACLE_MAX_SPEED
+        slots[shown:] = 0
+        return out
+
+
+def _buffers(buffer, num_envs):
+    # NumPy views of the shared block: observations, rewards, terminated,
+    # truncated, actions, scores and final scores
+    layout = [
+        ("observations", np.float32, (num_envs, OBSERVATION_SIZE)),
+        ("rewards", np.float32, (num_envs,)),
+        ("scores", np.int64, (num_envs,)),
+        ("final_scores", np.int64, (num_envs,)),
+        ("terminated", np.bool_, (num_envs,)),
+        ("truncated", np.bool_, (num_envs,)),
+        ("actions", np.uint8, (num_envs,)),
+    ]
+    views = {}
+    offset = 0
+    for name, dtype, shape in layout:
+        offset = (offset + 7) // 8 * 8
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if buffer is not None:
+            views[name] = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+        offset += size
+    return views, offset
+
+
+def _step_envs(envs, start, views):
+    # Step envs[i] as env start + i, resetting the ones that finished. The
+    # observation of a finished env is the first one of its next game.
+    observations = views["observations"]
+    for i, env in enumerate(envs):
+        j = start + i
+        _, reward, terminated, truncated, info = env.step(int(views["actions"][j]), out=observations[j])
+        views["rewards"][j] = reward
+        views["terminated"][j] = terminated
+        views["truncated"][j] = truncated
+        if terminated or truncated:
+            views["final_scores"][j] = info["score"]
+            env.reset(out=observations[j])
+        else:
+            views["final_scores"][j] = -1
+        views["scores"][j] = env.state.player.score
+
+
+def _reset_envs(envs, start, views, seeds):
+    for i, env in enumerate(envs):
+        j = start + i
+        env.reset(seed=seeds[j], out=views["observations"][j])
+        views["scores"][j] = 0
+        views["final_scores"][j] = -1
+
+
+def _worker(connection, shm_name, num_envs, start, count, env_kwargs):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = None
+    try:
+        views, _ = _buffers(shm.buf, num_envs)
+        envs = [SpaceDodgeEnv(**env_kwargs) for _ in range(count)]
+        while True:
+            command, argument = connection.recv()
+            if command == "step":
+                _step_envs(envs, start, views)
+            elif command == "reset":
+                _reset_envs(envs, start, views, argument)
+            elif command == "close":
+                break
+            connection.send(None)
+    finally:
+        views = None  # Drop the views before closing the block they point into
+        shm.close()
+
+
+class VectorEnv:
+    # N independent games stepped together. With workers=0 everything runs
+    # in this process, which is handy for debugging.
+    def __init__(self, num_envs, workers=None, **env_kwargs):
+        if workers is None:
+            workers = min(multiprocessing.cpu_count(), num_envs)
+        self.num_envs = num_envs
+        self.workers = workers
+        _, size = _buffers(None, num_envs)
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._views, _ = _buffers(self._shm.buf, num_envs)
+        self._connections = []
+        self._processes = []
+        self._envs = None
+        if workers == 0:
+            self._envs = [SpaceDodgeEnv(**env_kwargs) for _ in range(num_envs)]
+            return
+        # Contiguous shards, as even as possible
+        bounds = np.linspace(0, num_envs, workers + 1).astype(int)
+        for start, end in zip(bounds[:-1], bounds[1:]):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker, args=(child, self._shm.name, num_envs, start, end - start, env_kwargs),
+                daemon=True
+            )
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def _broadcast(self, command, argument=None):
+        for connection in self._connections:
+            connection.send((command, argument))
+        for connection in self._connections:
+            connection.recv()
+
+    def reset(self, seed=None):
+        # Returns (observations, infos); env i is seeded with seed + i
+        seeds = [None if seed is None else seed + i for i in range(self.num_envs)]
+        if self._envs is not None:
+            _reset_envs(self._envs, 0, self._views, seeds)
+        else:
+            self._broadcast("reset", seeds)
+        return self._views["observations"], self._infos()
+
+    def step(self, actions):
+        # Returns (observations, rewards, terminated, truncated, infos). The
+        # arrays are views of the shared buffers and are overwritten by the
+        # next call; copy them to keep them.
+        self._views["actions"][:] = actions
+        if self._envs is not None:
+            _step_envs(self._envs, 0, self._views)
+        else:
+            self._broadcast("step")
+        views = self._views
+        return (views["observations"], views["rewards"], views["terminated"],
+                views["truncated"], self._infos())
+
+    def _infos(self):
+        # final_scores is the score of a game that ended this step, else -1
+        return {"score": self._views["scores"], "final_score": self._views["final_scores"]}
+
+    def close(self):
+        if self._shm is None:
+            return
+        for connection in self._connections:
+            connection.send(("close", None))
+        for process in self._processes:
+            process.join()
+        self._views = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_random(num_envs, steps, workers=None, seed=None):
+    # Random actions through a VectorEnv; returns (env steps, games finished,
+    # seconds)
+    rng = np.random.default_rng(seed)
+    finished = 0
+    with VectorEnv(num_envs, workers=workers) as envs:
+        envs.reset(seed=seed)
+        start = time.perf_counter()
+        for _ in range(steps):
+            _, _, terminated, truncated, _ = envs.step(rng.integers(ACTIONS, size=num_envs))
+            finished += int(np.count_nonzero(terminated | truncated))
+        elapsed = time.perf_counter() - start
+    return num_envs * steps, finished, elapsed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Step Space Dodge environments with random actions.")
+    parser.add_argument("--envs", type=int, default=64, help="games stepped per call")
+    parser.add_argument("--steps", type=int, default=2000, help="calls to step()")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (0 = in-process)")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    args = parser.parse_args()
+
+    env_steps, finished, elapsed = run_random(args.envs, args.steps, args.workers, args.seed)
+    print(f"{env_steps} env steps, {finished} games finished in {elapsed:.3f}s "
+          f"({env_steps / elapsed:.0f} steps/sec, {env_steps / elapsed / TICK_RATE:.0f}x real time)")
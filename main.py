@@ -3,56 +3,200 @@ import sys
 import random
 import json
 import os
-
-# Initialize constants
-WIDTH, HEIGHT = 1000, 800
+import time
+import socket
+import sqlite3
+
+from assets import AssetManager, TextCache, HudField
+from renderer import DirtyRenderer
+from timing import FixedTimestep
+from profiler import FrameProfiler
+from replay import Recorder
+from savefile import load_game, save_game
+from autosave import AutoSaver
+from catalog import SaveCatalog, THUMBNAIL_SIZE, format_entry
+from startup import StartupTimer, BackgroundLoader, font_paths
+from audio import SoundBank, init_mixer, DEFAULT_FREQUENCY, DEFAULT_BUFFER
+from particles import Starfield, ParticleLayer, fade_sprites, DEBRIS_COLOR
+from scenes import Scene, SceneStack
+from scores import ScoreStore, ScoreWriter, Run, run_day
+from memory import GameplayGC, AllocationTracer, freeze_heap
+from controls import InputMapper, LatencyProbe, DEFAULT_BINDINGS
+from netplay import NetClient, WAITING, OVER, DEFAULT_PORT
+from capture import FrameCapture
+from simulation import (
+    WIDTH, HEIGHT, TICK_RATE, PLAYER_SIZE, OBSTACLE_SIZE,
+    new_game, step
+)
+
+# Frame rate for menus, and the cap on gameplay rendering (0 = uncapped).
+# The game itself always simulates at TICK_RATE whatever this is set to.
 FPS = 60
+MAX_RENDER_FPS = FPS
+
+# Time each startup stage; set REPORT_STARTUP to print them once loaded
+STARTUP = StartupTimer()
+REPORT_STARTUP = False
 
-# Initialize Pygame modules
-pygame.init()
-pygame.font.init()
-pygame.mixer.init()
+# Initialize Pygame modules. The mixer is left until audio is first needed
+# (see load_audio), since opening the audio device can be slow.
+with STARTUP.stage("pygame init"):
+    pygame.display.init()
+    pygame.font.init()
 
 # Create the game window
-WIN = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Space Dodge")
-CLOCK = pygame.time.Clock()
-
-# Load assets
-BACKGROUND_IMAGE = pygame.image.load("assets/bg.png").convert()
-BACKGROUND_IMAGE = pygame.transform.scale(BACKGROUND_IMAGE, (WIDTH, HEIGHT))
-START_BG_IMAGE = pygame.image.load("assets/start_bg.png").convert()
-START_BG_IMAGE = pygame.transform.scale(START_BG_IMAGE, (WIDTH, HEIGHT))
-PLAYER_IMAGE = pygame.image.load("assets/player.png").convert_alpha()
-ASTEROID_IMAGE = pygame.image.load("assets/asteroid.png").convert_alpha()
-
-# Load sounds
-pygame.mixer.music.load("assets/start_music.mp3")
+with STARTUP.stage("window"):
+    WIN = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Space Dodge")
+    CLOCK = pygame.time.Clock()
+
+# Fonts, from font files found on an earlier run where possible
+with STARTUP.stage("fonts"):
+    FONT_PATHS = font_paths(["Arial", "Courier New,monospace"])
+    TITLE_FONT = pygame.font.Font(FONT_PATHS["Arial"], 72)
+    BUTTON_FONT = pygame.font.Font(FONT_PATHS["Arial"], 48)
+    INSTRUCTION_FONT = pygame.font.Font(FONT_PATHS["Arial"], 36)
+    CREDIT_FONT = pygame.font.Font(FONT_PATHS["Arial"], 24)
+    PROFILER_FONT = pygame.font.Font(FONT_PATHS["Courier New,monospace"], 16)
+
+# Only the start screen's background is loaded up front
+ASSETS = AssetManager()
+with STARTUP.stage("start screen assets"):
+    ASSETS.load("start_bg", "assets/start_bg.png", alpha=False)
+    START_BG_IMAGE = ASSETS.prebake("start_bg", (WIDTH, HEIGHT))
+
+# Sounds and gameplay images are loaded on a background thread while the
+# start screen runs; finish_loading() fills these in once it's done
+START_MUSIC = "assets/start_music.mp3"
 GAME_MUSIC = "assets/game_music.mp3"
-CRASH_SOUND = pygame.mixer.Sound("assets/crash.mp3")
-EASTER_EGG_SOUND = pygame.mixer.Sound("assets/easter_egg.mp3")  # Easter egg sound
+GAMEPLAY_IMAGES = {
+    "bg": ("assets/bg.png", False),
+    "player": ("assets/player.png", True),
+    "asteroid": ("assets/asteroid.png", True),
+}
+BACKGROUND_IMAGE = None
+PLAYER_SPRITE = None
+ASTEROID_FRAMES = None  # RotationFrames: every size and angle an asteroid is drawn at
+AUDIO = None  # SoundBank with the effects and both music tracks
+
+def load_images():
+    # Decoding only; converting to the display format happens on the main thread
+    return {
+        name: (pygame.image.load(path), alpha)
+        for name, (path, alpha) in GAMEPLAY_IMAGES.items()
+    }
+
+def load_audio():
+    init_mixer(AUDIO_FREQUENCY, AUDIO_BUFFER)
+    bank = SoundBank()
+    bank.load_effect("crash", "assets/crash.mp3", priority=1, max_voices=3)
+    bank.load_effect("easter_egg", "assets/easter_egg.mp3", priority=2, max_voices=1)  # Easter egg sound
+    bank.load_track("start", START_MUSIC)
+    bank.load_track("game", GAME_MUSIC)
+    return bank
 
-# Fonts
-TITLE_FONT = pygame.font.SysFont("Arial", 72)
-BUTTON_FONT = pygame.font.SysFont("Arial", 48)
-INSTRUCTION_FONT = pygame.font.SysFont("Arial", 36)
-CREDIT_FONT = pygame.font.SysFont("Arial", 24)
+# Rendered text is cached; TEXT_CACHE.stats() shows hits/misses
+TEXT_CACHE = TextCache()
 
 # Colors
 WHITE = (255, 255, 255)
 YELLOW = (255, 255, 0)
 
+# Only redraw and push the parts of the screen that changed during gameplay
+DIRTY_RENDERING = True
+
+# Parallax starfields as (count, speed in px/s, radius, brightness) layers,
+# far to near. The gameplay one is sparser so it doesn't distract.
+START_STARFIELD = ((120, 25, 1, 110), (70, 60, 2, 190), (25, 120, 2, 255))
+GAME_STARFIELD = ((60, 20, 1, 90), (30, 45, 1, 160), (12, 90, 2, 220))
+
+# Asteroids are drawn spinning at one of a few sizes around their (fixed,
+# OBSTACLE_SIZE) hitbox, from frames rotated once at load. Each asteroid's
+# size, spin direction and starting angle follow from its x position, which
+# never changes, and it turns one step per ASTEROID_SPIN_PIXELS fallen.
+ASTEROID_SIZES = [(int(OBSTACLE_SIZE[0] * scale), int(OBSTACLE_SIZE[1] * scale)) for scale in (0.85, 1.0, 1.15)]
+ASTEROID_ANGLES = 72
+ASTEROID_SPIN_PIXELS = 8
+
+# Debris thrown off when the player is hit
+DEBRIS_PARTICLES = 80
+DEBRIS_SPEED = 320  # px/s
+DEBRIS_LIFE = 0.8  # seconds
+
+# Per-phase frame profiling; F3 toggles it (and its overlay) during play.
+# The trace is written to PROFILE_TRACE (.csv or .json) when the game ends.
+PROFILING = False
+PROFILE_TRACE = "profile_trace.json"
+
+# The garbage collector is kept out of gameplay: the loaded heap is frozen,
+# and automatic collection is off while a game is on screen and runs when it
+# stops (pause menu, countdown, game over).
+GAMEPLAY_GC = GameplayGC()
+
+# Allocation tracing; F4 toggles it during play. Blocks allocated during a
+# frame and still alive at its end are reported per call site to
+# ALLOCATION_REPORT when the game ends. Slows every frame down a lot.
+TRACE_ALLOCATIONS = False
+ALLOCATION_REPORT = "allocations.txt"
+
+# Input-to-display latency measurement; F5 toggles it during play. The
+# report is written to LATENCY_REPORT when the game ends.
+PROBE_LATENCY = False
+LATENCY_REPORT = "latency.txt"
+
+# Capture every rendered frame of a game to CAPTURE_DIR ("raw" video or
+# "png" sequence, see capture.py); F6 starts and stops it during play.
+CAPTURE_FRAMES = False
+CAPTURE_FORMAT = "raw"
+CAPTURE_DIR = 'captures'
+NOTICE_SECONDS = 4  # How long HUD notices (capture started/saved) stay up
+
+# Record every game (seed + per-tick input) to REPLAY_DIR; play them back
+# headless with `python replay.py replays/*.sdr`
+RECORD_REPLAYS = False
+REPLAY_DIR = 'replays'
+
+# New saves use the compact binary format (.sav); '.json' writes the old
+# text format. Both load either way.
+SAVE_EXTENSION = '.sav'
+
+# Snapshot the game every few seconds and write it in the background to a
+# small ring of autosave files in saves/
+AUTOSAVE = True
+
+# Index of the saves directory that the load menu pages through
+CATALOG = SaveCatalog('saves')
+SAVES_PER_PAGE = 6
+SAVE_ROW_HEIGHT = 90
+
+# Every finished game goes into the score history, written in the background
+SCORES = ScoreStore('scores.db')
+SCORE_WRITER = ScoreWriter(SCORES)
+LEADERBOARD_SIZE = 5
+
 # Volume settings (default values)
 MUSIC_VOLUME = 0.5
 SFX_VOLUME = 0.5
 
+# Mixer setup; a smaller buffer lowers audio latency. Only editable in
+# settings.json, and only read at startup.
+AUDIO_FREQUENCY = DEFAULT_FREQUENCY
+AUDIO_BUFFER = DEFAULT_BUFFER
+
+# Keyboard and gamepad bindings per action, in the format described in
+# controls.py. Only editable in settings.json.
+BINDINGS = DEFAULT_BINDINGS
+
 def load_settings():
-    global MUSIC_VOLUME, SFX_VOLUME
+    global MUSIC_VOLUME, SFX_VOLUME, AUDIO_FREQUENCY, AUDIO_BUFFER, BINDINGS
     try:
         with open('settings.json', 'r') as f:
             settings = json.load(f)
             MUSIC_VOLUME = settings.get('music_volume', 0.5)
             SFX_VOLUME = settings.get('sfx_volume', 0.5)
+            AUDIO_FREQUENCY = settings.get('audio_frequency', DEFAULT_FREQUENCY)
+            AUDIO_BUFFER = settings.get('audio_buffer', DEFAULT_BUFFER)
+            BINDINGS = settings.get('bindings', DEFAULT_BINDINGS)
     except FileNotFoundError:
         MUSIC_VOLUME = 0.5
         SFX_VOLUME = 0.5
@@ -61,589 +205,966 @@ def save_settings():
     settings = {
         'music_volume': MUSIC_VOLUME,
         'sfx_volume': SFX_VOLUME,
+        'audio_frequency': AUDIO_FREQUENCY,
+        'audio_buffer': AUDIO_BUFFER,
+        'bindings': BINDINGS,
     }
     with open('settings.json', 'w') as f:
         json.dump(settings, f)
 
 load_settings()
-pygame.mixer.music.set_volume(MUSIC_VOLUME)
-CRASH_SOUND.set_volume(SFX_VOLUME)
-EASTER_EGG_SOUND.set_volume(SFX_VOLUME)
-
-# Classes
-class Player:
-    def __init__(self, x, y, speed, lives=3, score=0):
-        self.image = pygame.transform.scale(PLAYER_IMAGE, (50, 50))
-        self.rect = self.image.get_rect(center=(x, y))
-        self.speed = speed
-        self.lives = lives
-        self.score = score
-
-    def draw(self, window):
-        window.blit(self.image, self.rect)
-
-    def move(self):
-        keys_pressed = pygame.key.get_pressed()
-        if (keys_pressed[pygame.K_LEFT] or keys_pressed[pygame.K_a]) and self.rect.left > 0:
-            self.rect.x -= self.speed
-        if (keys_pressed[pygame.K_RIGHT] or keys_pressed[pygame.K_d]) and self.rect.right < WIDTH:
-            self.rect.x += self.speed
-        if (keys_pressed[pygame.K_UP] or keys_pressed[pygame.K_w]) and self.rect.top > 0:
-            self.rect.y -= self.speed
-        if (keys_pressed[pygame.K_DOWN] or keys_pressed[pygame.K_s]) and self.rect.bottom < HEIGHT:
-            self.rect.y += self.speed
-
-class Obstacle:
-    def __init__(self):
-        self.image = pygame.transform.scale(ASTEROID_IMAGE, (50, 50))
-        self.rect = self.image.get_rect(
-            center=(random.randint(50, WIDTH - 50), -50)
-        )
-        self.speed = random.randint(3, 7)
 
-    def move(self):
-        self.rect.y += self.speed
+# A bad binding in settings.json falls back to the defaults; the start
+# screen says so
+BINDINGS_WARNING = None
+try:
+    CONTROLS = InputMapper(BINDINGS)
+except ValueError:
+    BINDINGS_WARNING = "Bad input bindings in settings.json, using the defaults"
+    CONTROLS = InputMapper(DEFAULT_BINDINGS)
+
+LOADER = BackgroundLoader([("gameplay images", load_images), ("audio", load_audio)], STARTUP)
+
+def finish_loading():
+    # Pick up what the background loader produced; True once everything is in
+    global BACKGROUND_IMAGE, PLAYER_SPRITE, ASTEROID_FRAMES, AUDIO
+    if BACKGROUND_IMAGE is not None:
+        return True
+    if not LOADER.done:
+        return False
+
+    with STARTUP.stage("gameplay assets"):
+        for name, (image, alpha) in LOADER.result("gameplay images").items():
+            ASSETS.add(name, image, alpha)
+        BACKGROUND_IMAGE = ASSETS.prebake("bg", (WIDTH, HEIGHT))
+        PLAYER_SPRITE = ASSETS.prebake("player", PLAYER_SIZE)
+        ASTEROID_FRAMES = ASSETS.frames("asteroid", ASTEROID_SIZES, ASTEROID_ANGLES, round=True)
+        AUDIO = LOADER.result("audio")
+        AUDIO.set_music_volume(MUSIC_VOLUME)
+        AUDIO.set_sfx_volume(SFX_VOLUME)
+        # Nothing loaded so far ever needs collecting
+        freeze_heap()
+    STARTUP.mark("ready")
+    if REPORT_STARTUP:
+        print(STARTUP.report())
+    return True
+
+def wait_for_assets():
+    # Show a loading indicator until the background loader is done
+    while not finish_loading():
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+        WIN.blit(START_BG_IMAGE, (0, 0))
+        draw_text(f"Loading... {LOADER.completed}/{LOADER.total}", INSTRUCTION_FONT, WHITE, WIN, WIDTH // 2, HEIGHT // 2)
+        pygame.display.flip()
+        CLOCK.tick(FPS)
 
-    def draw(self, window):
-        window.blit(self.image, self.rect)
+# Drawing and input for the simulation state
+def game_sprites(state, alpha=1.0):
+    # (image, position) pairs for the player and every asteroid, ready for
+    # Surface.blits(); alpha interpolates between the last two ticks
+    player = state.player
+    previous_x, previous_y = player.previous
+    sprites = [(PLAYER_SPRITE, (
+        previous_x + round((player.rect.x - previous_x) * alpha),
+        previous_y + round((player.rect.y - previous_y) * alpha)
+    ))]
+
+    obstacles = state.obstacles
+    sprites.extend(asteroid_sprites(obstacles.x[:len(obstacles)], obstacles.interpolated_y(alpha)))
+    return sprites
+
+def asteroid_sprites(x, y):
+    # (image, position) pairs for asteroids with top-left corners x, y
+    spin = (x // 3 % 2) * 2 - 1  # +1 or -1
+    angle = x * 7 + spin * (y // ASTEROID_SPIN_PIXELS)
+    index = ASTEROID_FRAMES.index(x % len(ASTEROID_SIZES), angle)
+    left = x + OBSTACLE_SIZE[0] // 2 - ASTEROID_FRAMES.offset_x[index]
+    top = y + OBSTACLE_SIZE[1] // 2 - ASTEROID_FRAMES.offset_y[index]
+    frames = ASTEROID_FRAMES.frames
+    return [(frames[i], position) for i, position in zip(index.tolist(), zip(left.tolist(), top.tolist()))]
+
+def draw_game(renderer, state, alpha=1.0):
+    renderer.draw_many(game_sprites(state, alpha))
 
 # Functions
 def draw_text(text, font, color, surface, x, y):
-    textobj = font.render(text, True, color)
+    textobj = TEXT_CACHE.render(font, text, color)
     textrect = textobj.get_rect(center=(x, y))
     surface.blit(textobj, textrect)
 
-def get_text_input(prompt):
-    input_active = True
-    user_text = ''
-    input_box = pygame.Rect(WIDTH // 2 - 150, HEIGHT // 2, 300, 50)
-    color_active = pygame.Color('dodgerblue2')
+def draw_text_left(text, font, color, surface, x, y):
+    textobj = TEXT_CACHE.render(font, text, color)
+    textrect = textobj.get_rect(midleft=(x, y))
+    surface.blit(textobj, textrect)
 
-    while input_active:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                input_active = False
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    if user_text != '':
-                        return user_text
-                elif event.key == pygame.K_BACKSPACE:
-                    user_text = user_text[:-1]
-                else:
-                    user_text += event.unicode
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if not input_box.collidepoint(event.pos):
-                    input_active = False
-                    return None
 
-        WIN.fill((30, 30, 30))
-        draw_text(prompt, INSTRUCTION_FONT, WHITE, WIN, WIDTH // 2, HEIGHT // 2 - 50)
+def save_game_state(stack, state):
+    # Ask for a name over the pause menu, then save `state` under it
+    def save(save_name):
+        # Replace spaces and illegal characters in filename
+        filename = f'saves/{save_name.replace(" ", "_")}{SAVE_EXTENSION}'
+
+        if not os.path.exists('saves'):
+            os.makedirs('saves')
+
+        save_game(filename, state)
+        CATALOG.record(filename, state)
+
+        stack.push(MessageScene(f"Game saved as '{save_name}'"))
+
+    stack.push(TextInputScene("Enter a name for your save game:", save))
+
+def dimmed_screen(overlay):
+    # What's on screen now with `overlay` on top, as a menu's backdrop
+    backdrop = WIN.copy()
+    backdrop.blit(overlay, (0, 0))
+    return backdrop
+
+def save_replay(recorder, state):
+    if not os.path.exists(REPLAY_DIR):
+        os.makedirs(REPLAY_DIR)
+    recorder.save(f"{REPLAY_DIR}/{time.strftime('%Y%m%d-%H%M%S')}.sdr", state)
+
+def start_capture():
+    name = time.strftime('%Y%m%d-%H%M%S')
+    if CAPTURE_FORMAT == "raw":
+        name += ".raw"
+    return FrameCapture(WIN, os.path.join(CAPTURE_DIR, name), CAPTURE_FORMAT, fps=MAX_RENDER_FPS or FPS)
+
+# Scenes. Only the top one of the stack is drawn. Menus are idle scenes
+# (see scenes.py) that only redraw after input; the overlays among them keep
+# a copy of the screen they were opened over to redraw on top of.
+class TextInputScene(Scene):
+    idle = True
+
+    def __init__(self, prompt, on_submit):
+        super().__init__()
+        self.prompt = prompt
+        self.on_submit = on_submit  # Called with the text; not called if canceled
+        self.user_text = ''
+        self.input_box = pygame.Rect(WIDTH // 2 - 150, HEIGHT // 2, 300, 50)
+        self.color_active = pygame.Color('dodgerblue2')
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_RETURN:
+                if self.user_text != '':
+                    self.stack.pop()
+                    self.on_submit(self.user_text)
+            elif event.key == pygame.K_BACKSPACE:
+                self.user_text = self.user_text[:-1]
+            else:
+                self.user_text += event.unicode
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if not self.input_box.collidepoint(event.pos):
+                self.stack.pop()  # Canceled
+
+    def draw(self, surface):
+        surface.fill((30, 30, 30))
+        draw_text(self.prompt, INSTRUCTION_FONT, WHITE, surface, WIDTH // 2, HEIGHT // 2 - 50)
 
         # Render the current text.
-        txt_surface = INSTRUCTION_FONT.render(user_text, True, color_active)
+        txt_surface = TEXT_CACHE.render(INSTRUCTION_FONT, self.user_text, self.color_active)
 
         # Resize the box if the text is too long.
-        width = max(300, txt_surface.get_width() + 10)
-        input_box.w = width
+        self.input_box.w = max(300, txt_surface.get_width() + 10)
 
         # Blit the text.
-        WIN.blit(txt_surface, (input_box.x + 5, input_box.y + 10))
+        surface.blit(txt_surface, (self.input_box.x + 5, self.input_box.y + 10))
         # Blit the input_box rect.
-        pygame.draw.rect(WIN, color_active, input_box, 2)
+        pygame.draw.rect(surface, self.color_active, self.input_box, 2)
 
         pygame.display.flip()
-        CLOCK.tick(FPS)
-
-def save_game_state(player, obstacles, obstacle_timer):
-    save_name = get_text_input("Enter a name for your save game:")
-    if save_name is None:
-        return  # User canceled save
-
-    # Replace spaces and illegal characters in filename
-    filename = f'saves/{save_name.replace(" ", "_")}.json'
-
-    game_state = {
-        'player': {
-            'x': player.rect.centerx,
-            'y': player.rect.centery,
-            'lives': player.lives,
-            'score': player.score
-        },
-        'obstacles': [
-            {
-                'x': obs.rect.centerx,
-                'y': obs.rect.centery,
-                'speed': obs.speed
-            } for obs in obstacles
-        ],
-        'obstacle_timer': obstacle_timer
-    }
-
-    if not os.path.exists('saves'):
-        os.makedirs('saves')
-
-    with open(filename, 'w') as f:
-        json.dump(game_state, f)
-
-    show_message(f"Game saved as '{save_name}'")
 
-def load_game_menu():
-    # Get list of saved games
-    if not os.path.exists('saves'):
-        show_message("No saved games found.")
-        return None
-
-    saved_games = [f for f in os.listdir('saves') if f.endswith('.json')]
-    if not saved_games:
-        show_message("No saved games found.")
-        return None
-
-    selected = 0
-    menu_running = True
-    while menu_running:
-        WIN.fill((0, 0, 0))
-        draw_text("Load Game", TITLE_FONT, YELLOW, WIN, WIDTH // 2, HEIGHT // 2 - 200)
-
-        # Display saved games
-        for idx, save_file in enumerate(saved_games):
-            y_position = HEIGHT // 2 - 100 + idx * 50
-            if idx == selected:
+class LoadScene(Scene):
+    idle = True
+
+    # Saves come from the catalog one page at a time, and thumbnails are
+    # only fetched for the rows on screen
+    def __init__(self, total, on_load):
+        super().__init__()
+        self.on_load = on_load  # Called with the loaded GameState
+        self.pages = (total + SAVES_PER_PAGE - 1) // SAVES_PER_PAGE
+        self.page = 0
+        self.entries = CATALOG.page(self.page, SAVES_PER_PAGE)
+        self.thumbnails = {}
+        self.selected = 0
+        self.rows = []
+
+    def handle_event(self, event):
+        chosen = None
+        if event.type == pygame.KEYDOWN and not self.entries:
+            # The saves went away since the catalog was counted
+            if event.key == pygame.K_ESCAPE:
+                self.stack.pop()
+            else:
+                self.stack.replace(MessageScene("No saved games found."))
+            return
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_UP:
+                self.selected = (self.selected - 1) % len(self.entries)
+            if event.key == pygame.K_DOWN:
+                self.selected = (self.selected + 1) % len(self.entries)
+            if event.key in (pygame.K_LEFT, pygame.K_PAGEUP, pygame.K_RIGHT, pygame.K_PAGEDOWN):
+                step_pages = -1 if event.key in (pygame.K_LEFT, pygame.K_PAGEUP) else 1
+                self.page = (self.page + step_pages) % max(self.pages, 1)
+                self.entries = CATALOG.page(self.page, SAVES_PER_PAGE)
+                self.thumbnails = {}  # Only keep the thumbnails of the page on screen
+                self.selected = max(0, min(self.selected, len(self.entries) - 1))
+                if not self.entries:
+                    self.stack.replace(MessageScene("No saved games found."))
+                    return
+            if event.key == pygame.K_RETURN:
+                chosen = self.entries[self.selected]
+            if event.key == pygame.K_ESCAPE:
+                self.stack.pop()
+                return
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:  # Left click
+                for idx, row in enumerate(self.rows):
+                    if row.collidepoint(event.pos):
+                        chosen = self.entries[idx]
+
+        if chosen is not None:
+            try:
+                state = load_game(os.path.join('saves', chosen.filename))
+            except (OSError, ValueError, KeyError, TypeError):
+                self.stack.push(MessageScene(f"Couldn't load '{chosen.name}'"))
+            else:
+                self.on_load(state)
+
+    def draw(self, surface):
+        surface.fill((0, 0, 0))
+        draw_text("Load Game", TITLE_FONT, YELLOW, surface, WIDTH // 2, 80)
+
+        # Display this page of saved games
+        self.rows = []
+        if not self.entries:
+            draw_text("No saved games found.", INSTRUCTION_FONT, WHITE, surface, WIDTH // 2, HEIGHT // 2)
+        for idx, entry in enumerate(self.entries):
+            row = pygame.Rect(WIDTH // 2 - 350, 150 + idx * SAVE_ROW_HEIGHT, 700, SAVE_ROW_HEIGHT - 10)
+            self.rows.append(row)
+            if idx == self.selected:
                 color = YELLOW
             else:
                 color = WHITE
-            save_name = os.path.splitext(save_file)[0].replace("_", " ")
-            draw_text(save_name, BUTTON_FONT, color, WIN, WIDTH // 2, y_position)
-
-        pygame.display.flip()
-
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                menu_running = False
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_UP:
-                    selected = (selected - 1) % len(saved_games)
-                if event.key == pygame.K_DOWN:
-                    selected = (selected + 1) % len(saved_games)
-                if event.key == pygame.K_RETURN:
-                    filename = f'saves/{saved_games[selected]}'
-                    with open(filename, 'r') as f:
-                        game_state = json.load(f)
-                    return game_state
-                if event.key == pygame.K_ESCAPE:
-                    menu_running = False
-                    return None
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if event.button == 1:  # Left click
-                    for idx, save_file in enumerate(saved_games):
-                        y_position = HEIGHT // 2 - 100 + idx * 50
-                        text_rect = pygame.Rect(WIDTH // 2 - 100, y_position - 25, 200, 50)
-                        if text_rect.collidepoint(event.pos):
-                            filename = f'saves/{saved_games[idx]}'
-                            with open(filename, 'r') as f:
-                                game_state = json.load(f)
-                            return game_state
-
-        CLOCK.tick(FPS)
-
-def start_screen():
-    # Start background music
-    pygame.mixer.music.play(-1)
 
-    # Create stars for animated background
-    stars = [[random.randint(0, WIDTH), random.randint(0, HEIGHT)] for _ in range(100)]
-    star_speed = 1
+            if entry.filename not in self.thumbnails:
+                pixels = CATALOG.thumbnail(entry.filename)
+                self.thumbnails[entry.filename] = (
+                    pygame.image.frombytes(pixels, THUMBNAIL_SIZE, "RGB") if pixels else None
+                )
+            thumbnail_rect = pygame.Rect(row.topleft, THUMBNAIL_SIZE)
+            if self.thumbnails[entry.filename] is not None:
+                surface.blit(self.thumbnails[entry.filename], thumbnail_rect)
+            pygame.draw.rect(surface, color, thumbnail_rect, 1)
 
-    # Buttons
-    button_width = 200
-    button_height = 50
-    start_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 - 100), (button_width, button_height))
-    load_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 - 30), (button_width, button_height))
-    quit_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 + 40), (button_width, button_height))
+            text_x = thumbnail_rect.right + 20
+            draw_text_left(entry.name, INSTRUCTION_FONT, color, surface, text_x, row.y + 20)
+            draw_text_left(format_entry(entry), CREDIT_FONT, color, surface, text_x, row.y + 55)
 
-    # Easter egg variables
-    secret_code = []
-    easter_egg_activated = False
-
-    # Main loop for the start screen
-    while True:
-        WIN.blit(START_BG_IMAGE, (0, 0))
+        draw_text(f"Page {self.page + 1} of {self.pages}  -  Left/Right to turn the page", CREDIT_FONT,
+                  WHITE, surface, WIDTH // 2, HEIGHT - 40)
 
-        # Animate stars
-        for star in stars:
-            pygame.draw.circle(WIN, WHITE, star, 2)
-            star[1] += star_speed
-            if star[1] > HEIGHT:
-                star[0] = random.randint(0, WIDTH)
-                star[1] = 0
+        pygame.display.flip()
 
-        # Event handling
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+class StartScene(Scene):
+    # Easter egg code: Up, Up, Down, Down, Left, Right, Left, Right, B, A
+    KEY_SEQUENCE = [
+        pygame.K_UP, pygame.K_UP, pygame.K_DOWN, pygame.K_DOWN,
+        pygame.K_LEFT, pygame.K_RIGHT, pygame.K_LEFT, pygame.K_RIGHT,
+        pygame.K_b, pygame.K_a
+    ]
 
-            if event.type == pygame.KEYDOWN:
-                # Easter egg code: Up, Up, Down, Down, Left, Right, Left, Right, B, A
-                key_sequence = [
-                    pygame.K_UP, pygame.K_UP, pygame.K_DOWN, pygame.K_DOWN,
-                    pygame.K_LEFT, pygame.K_RIGHT, pygame.K_LEFT, pygame.K_RIGHT,
-                    pygame.K_b, pygame.K_a
-                ]
-                secret_code.append(event.key)
-                if secret_code == key_sequence[:len(secret_code)]:
-                    if len(secret_code) == len(key_sequence):
-                        easter_egg_activated = True
-                        EASTER_EGG_SOUND.play()
-                        show_message("Easter Egg Activated!")
-                        secret_code = []
+    def __init__(self):
+        super().__init__()
+        # Background music starts once the audio has loaded
+        self.music_playing = False
+        self.first_frame = True
+
+        # Animated starfield background
+        self.stars = Starfield(WIDTH, HEIGHT, START_STARFIELD)
+
+        # Buttons
+        button_width = 200
+        button_height = 50
+        self.start_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 - 100), (button_width, button_height))
+        self.load_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 - 30), (button_width, button_height))
+        self.quit_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 + 40), (button_width, button_height))
+
+        # Easter egg variables
+        self.secret_code = []
+        self.easter_egg_activated = False
+
+    def resume(self):
+        # Back from the load menu or a message
+        if self.music_playing:
+            AUDIO.play_music("start")
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            self.secret_code.append(event.key)
+            if self.secret_code == self.KEY_SEQUENCE[:len(self.secret_code)]:
+                if len(self.secret_code) == len(self.KEY_SEQUENCE):
+                    self.easter_egg_activated = True
+                    wait_for_assets()
+                    AUDIO.play("easter_egg")
+                    self.stack.push(MessageScene("Easter Egg Activated!"))
+                    self.secret_code = []
+            else:
+                self.secret_code = []
+
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if self.start_button.collidepoint(event.pos):
+                wait_for_assets()
+                AUDIO.stop_music()
+                self.stack.replace(PlayScene(easter_egg_activated=self.easter_egg_activated))  # Start the game
+            elif self.load_button.collidepoint(event.pos):
+                wait_for_assets()
+                AUDIO.stop_music()
+                total = CATALOG.refresh()
+                if total:
+                    self.stack.push(LoadScene(total, self.resume_saved_game))
                 else:
-                    secret_code = []
-
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if start_button.collidepoint(event.pos):
-                    pygame.mixer.music.stop()
-                    main(easter_egg_activated=easter_egg_activated)
-                    return  # Start the game
-                if load_button.collidepoint(event.pos):
-                    pygame.mixer.music.stop()
-                    game_state = load_game_menu()
-                    if game_state:
-                        main(game_state=game_state, easter_egg_activated=easter_egg_activated)
-                    else:
-                        pygame.mixer.music.play(-1)
-                if quit_button.collidepoint(event.pos):
-                    pygame.quit()
-                    sys.exit()
+                    self.stack.push(MessageScene("No saved games found."))
+            elif self.quit_button.collidepoint(event.pos):
+                self.stack.clear()
+
+    def resume_saved_game(self, game_state):
+        stack = self.stack
+        stack.reset(PlayScene(game_state=game_state, easter_egg_activated=self.easter_egg_activated))
+        # Display a message and count down before resuming
+        stack.push(CountdownScene())
+        stack.push(MessageScene("Resuming saved game..."))
+
+    def update(self, dt):
+        if not self.music_playing and finish_loading():
+            AUDIO.play_music("start")
+            self.music_playing = True
+        self.stars.update(min(dt, 0.1))
+
+    def draw(self, surface):
+        surface.blit(START_BG_IMAGE, (0, 0))
+        self.stars.draw(surface)
 
         # Draw title and buttons
-        draw_text("Space Dodge", TITLE_FONT, YELLOW, WIN, WIDTH // 2, HEIGHT // 3 - 100)
-        pygame.draw.rect(WIN, WHITE, start_button)
-        pygame.draw.rect(WIN, WHITE, load_button)
-        pygame.draw.rect(WIN, WHITE, quit_button)
-        draw_text("Start Game", BUTTON_FONT, (0, 0, 0), WIN, WIDTH // 2, start_button.y + 25)
-        draw_text("Load Game", BUTTON_FONT, (0, 0, 0), WIN, WIDTH // 2, load_button.y + 25)
-        draw_text("Quit", BUTTON_FONT, (0, 0, 0), WIN, WIDTH // 2, quit_button.y + 25)
-        draw_text("Developed by Your Name", CREDIT_FONT, WHITE, WIN, WIDTH // 2, HEIGHT - 30)
+        draw_text("Space Dodge", TITLE_FONT, YELLOW, surface, WIDTH // 2, HEIGHT // 3 - 100)
+        pygame.draw.rect(surface, WHITE, self.start_button)
+        pygame.draw.rect(surface, WHITE, self.load_button)
+        pygame.draw.rect(surface, WHITE, self.quit_button)
+        draw_text("Start Game", BUTTON_FONT, (0, 0, 0), surface, WIDTH // 2, self.start_button.y + 25)
+        draw_text("Load Game", BUTTON_FONT, (0, 0, 0), surface, WIDTH // 2, self.load_button.y + 25)
+        draw_text("Quit", BUTTON_FONT, (0, 0, 0), surface, WIDTH // 2, self.quit_button.y + 25)
+        draw_text("Developed by Your Name", CREDIT_FONT, WHITE, surface, WIDTH // 2, HEIGHT - 30)
+        if not self.music_playing:
+            draw_text("Loading...", CREDIT_FONT, WHITE, surface, WIDTH // 2, HEIGHT - 60)
 
         pygame.display.flip()
-        CLOCK.tick(FPS)
-
-def pause_menu(player, obstacles, obstacle_timer):
-    pygame.mixer.music.pause()  # Pause the game music
-
-    # Create semi-transparent overlay
-    overlay = pygame.Surface((WIDTH, HEIGHT))
-    overlay.set_alpha(180)  # Transparency level
-    overlay.fill((0, 0, 0))  # Black overlay
-
-    # Define buttons
-    button_width = 200
-    button_height = 50
-    unpause_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 - 120), (button_width, button_height))
-    settings_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 - 50), (button_width, button_height))
-    save_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 + 20), (button_width, button_height))
-    quit_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 + 90), (button_width, button_height))
-
-    paused = True
-    while paused:
-        WIN.blit(overlay, (0, 0))
-        draw_text("Game Paused", TITLE_FONT, YELLOW, WIN, WIDTH // 2, HEIGHT // 2 - 200)
+        if self.first_frame:
+            STARTUP.mark("first frame")
+            self.first_frame = False
+
+class PauseScene(Scene):
+    idle = True
+
+    def __init__(self, state):
+        super().__init__()
+        self.state = state
+
+        # Create semi-transparent overlay
+        self.overlay = pygame.Surface((WIDTH, HEIGHT))
+        self.overlay.set_alpha(180)  # Transparency level
+        self.overlay.fill((0, 0, 0))  # Black overlay
+        self.backdrop = None
+
+        # Define buttons
+        button_width = 200
+        button_height = 50
+        self.unpause_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 - 120), (button_width, button_height))
+        self.settings_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 - 50), (button_width, button_height))
+        self.save_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 + 20), (button_width, button_height))
+        self.quit_button = pygame.Rect((WIDTH // 2 - button_width // 2, HEIGHT // 2 + 90), (button_width, button_height))
+
+    def enter(self):
+        AUDIO.pause_music()  # Pause the game music
+        self.backdrop = dimmed_screen(self.overlay)
+
+    def exit(self):
+        AUDIO.unpause_music()  # Resume the game music
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.stack.pop()  # Unpause the game
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if self.unpause_button.collidepoint(event.pos):
+                self.stack.pop()
+            elif self.settings_button.collidepoint(event.pos):
+                self.stack.push(SettingsScene())
+            elif self.save_button.collidepoint(event.pos):
+                save_game_state(self.stack, self.state)
+            elif self.quit_button.collidepoint(event.pos):
+                self.stack.push(ConfirmScene("Are you sure you want to quit?", self.stack.clear))
+
+    def draw(self, surface):
+        surface.blit(self.backdrop, (0, 0))
+        draw_text("Game Paused", TITLE_FONT, YELLOW, surface, WIDTH // 2, HEIGHT // 2 - 200)
 
         # Draw buttons
-        pygame.draw.rect(WIN, WHITE, unpause_button)
-        pygame.draw.rect(WIN, WHITE, settings_button)
-        pygame.draw.rect(WIN, WHITE, save_button)
-        pygame.draw.rect(WIN, WHITE, quit_button)
+        pygame.draw.rect(surface, WHITE, self.unpause_button)
+        pygame.draw.rect(surface, WHITE, self.settings_button)
+        pygame.draw.rect(surface, WHITE, self.save_button)
+        pygame.draw.rect(surface, WHITE, self.quit_button)
 
-        draw_text("Resume", BUTTON_FONT, (0, 0, 0), WIN, WIDTH // 2, unpause_button.y + 25)
-        draw_text("Settings", BUTTON_FONT, (0, 0, 0), WIN, WIDTH // 2, settings_button.y + 25)
-        draw_text("Save Game", BUTTON_FONT, (0, 0, 0), WIN, WIDTH // 2, save_button.y + 25)
-        draw_text("Quit", BUTTON_FONT, (0, 0, 0), WIN, WIDTH // 2, quit_button.y + 25)
+        draw_text("Resume", BUTTON_FONT, (0, 0, 0), surface, WIDTH // 2, self.unpause_button.y + 25)
+        draw_text("Settings", BUTTON_FONT, (0, 0, 0), surface, WIDTH // 2, self.settings_button.y + 25)
+        draw_text("Save Game", BUTTON_FONT, (0, 0, 0), surface, WIDTH // 2, self.save_button.y + 25)
+        draw_text("Quit", BUTTON_FONT, (0, 0, 0), surface, WIDTH // 2, self.quit_button.y + 25)
 
         pygame.display.flip()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                paused = False
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    paused = False  # Unpause the game
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if unpause_button.collidepoint(event.pos):
-                    paused = False
-                elif settings_button.collidepoint(event.pos):
-                    settings_menu()
-                elif save_button.collidepoint(event.pos):
-                    save_game_state(player, obstacles, obstacle_timer)
-                elif quit_button.collidepoint(event.pos):
-                    confirm_quit = confirmation_dialog("Are you sure you want to quit?")
-                    if confirm_quit:
-                        pygame.quit()
-                        sys.exit()
-
-        CLOCK.tick(FPS)
+class SettingsScene(Scene):
+    idle = True
 
-    pygame.mixer.music.unpause()  # Resume the game music
-
-def settings_menu():
-    # Create overlay
-    overlay = pygame.Surface((WIDTH, HEIGHT))
-    overlay.set_alpha(180)
-    overlay.fill((0, 0, 0))
-
-    # Volume sliders
-    global MUSIC_VOLUME, SFX_VOLUME
-    slider_width = 300
-    slider_height = 20
-    music_slider = pygame.Rect((WIDTH // 2 - slider_width // 2, HEIGHT // 2 - 100), (slider_width, slider_height))
-    sfx_slider = pygame.Rect((WIDTH // 2 - slider_width // 2, HEIGHT // 2), (slider_width, slider_height))
-
-    adjusting_music = False
-    adjusting_sfx = False
-
-    settings_running = True
-    while settings_running:
-        WIN.blit(overlay, (0, 0))
-        draw_text("Settings", TITLE_FONT, YELLOW, WIN, WIDTH // 2, HEIGHT // 2 - 200)
+    def __init__(self):
+        super().__init__()
+        # Create overlay
+        self.overlay = pygame.Surface((WIDTH, HEIGHT))
+        self.overlay.set_alpha(180)
+        self.overlay.fill((0, 0, 0))
+        self.backdrop = None
+
+        # Volume sliders
+        self.slider_width = 300
+        self.slider_height = 20
+        self.music_slider = pygame.Rect((WIDTH // 2 - self.slider_width // 2, HEIGHT // 2 - 100), (self.slider_width, self.slider_height))
+        self.sfx_slider = pygame.Rect((WIDTH // 2 - self.slider_width // 2, HEIGHT // 2), (self.slider_width, self.slider_height))
+        self.back_button = pygame.Rect((WIDTH // 2 - 100, HEIGHT // 2 + 150), (200, 50))
+
+        self.adjusting_music = False
+        self.adjusting_sfx = False
+
+    def enter(self):
+        self.backdrop = dimmed_screen(self.overlay)
+
+    def handle_event(self, event):
+        global MUSIC_VOLUME, SFX_VOLUME
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if self.back_button.collidepoint(event.pos):
+                save_settings()
+                self.stack.pop()
+            elif self.music_slider.collidepoint(event.pos):
+                self.adjusting_music = True
+            elif self.sfx_slider.collidepoint(event.pos):
+                self.adjusting_sfx = True
+        if event.type == pygame.MOUSEBUTTONUP:
+            self.adjusting_music = False
+            self.adjusting_sfx = False
+        if event.type == pygame.MOUSEMOTION:
+            if self.adjusting_music:
+                mouse_x = event.pos[0]
+                music_volume = (mouse_x - self.music_slider.x) / self.slider_width
+                MUSIC_VOLUME = max(0.0, min(1.0, music_volume))
+                AUDIO.set_music_volume(MUSIC_VOLUME)
+                self.dirty = True
+            if self.adjusting_sfx:
+                mouse_x = event.pos[0]
+                sfx_volume = (mouse_x - self.sfx_slider.x) / self.slider_width
+                SFX_VOLUME = max(0.0, min(1.0, sfx_volume))
+                AUDIO.set_sfx_volume(SFX_VOLUME)
+                self.dirty = True
+
+    def draw(self, surface):
+        surface.blit(self.backdrop, (0, 0))
+        draw_text("Settings", TITLE_FONT, YELLOW, surface, WIDTH // 2, HEIGHT // 2 - 200)
 
         # Draw sliders
         # Music Volume
-        pygame.draw.rect(WIN, WHITE, music_slider)
-        music_handle_x = music_slider.x + int(MUSIC_VOLUME * slider_width)
-        pygame.draw.circle(WIN, YELLOW, (music_handle_x, music_slider.y + slider_height // 2), 10)
-        draw_text("Music Volume", INSTRUCTION_FONT, WHITE, WIN, WIDTH // 2, music_slider.y - 30)
+        pygame.draw.rect(surface, WHITE, self.music_slider)
+        music_handle_x = self.music_slider.x + int(MUSIC_VOLUME * self.slider_width)
+        pygame.draw.circle(surface, YELLOW, (music_handle_x, self.music_slider.y + self.slider_height // 2), 10)
+        draw_text("Music Volume", INSTRUCTION_FONT, WHITE, surface, WIDTH // 2, self.music_slider.y - 30)
 
         # SFX Volume
-        pygame.draw.rect(WIN, WHITE, sfx_slider)
-        sfx_handle_x = sfx_slider.x + int(SFX_VOLUME * slider_width)
-        pygame.draw.circle(WIN, YELLOW, (sfx_handle_x, sfx_slider.y + slider_height // 2), 10)
-        draw_text("SFX Volume", INSTRUCTION_FONT, WHITE, WIN, WIDTH // 2, sfx_slider.y - 30)
+        pygame.draw.rect(surface, WHITE, self.sfx_slider)
+        sfx_handle_x = self.sfx_slider.x + int(SFX_VOLUME * self.slider_width)
+        pygame.draw.circle(surface, YELLOW, (sfx_handle_x, self.sfx_slider.y + self.slider_height // 2), 10)
+        draw_text("SFX Volume", INSTRUCTION_FONT, WHITE, surface, WIDTH // 2, self.sfx_slider.y - 30)
 
         # Back Button
-        back_button = pygame.Rect((WIDTH // 2 - 100, HEIGHT // 2 + 150), (200, 50))
-        pygame.draw.rect(WIN, WHITE, back_button)
-        draw_text("Back", BUTTON_FONT, (0, 0, 0), WIN, WIDTH // 2, back_button.y + 25)
+        pygame.draw.rect(surface, WHITE, self.back_button)
+        draw_text("Back", BUTTON_FONT, (0, 0, 0), surface, WIDTH // 2, self.back_button.y + 25)
 
         pygame.display.flip()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                settings_running = False
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if back_button.collidepoint(event.pos):
-                    save_settings()
-                    settings_running = False
-                elif music_slider.collidepoint(event.pos):
-                    adjusting_music = True
-                elif sfx_slider.collidepoint(event.pos):
-                    adjusting_sfx = True
-            if event.type == pygame.MOUSEBUTTONUP:
-                adjusting_music = False
-                adjusting_sfx = False
-            if event.type == pygame.MOUSEMOTION:
-                if adjusting_music:
-                    mouse_x = event.pos[0]
-                    music_volume = (mouse_x - music_slider.x) / slider_width
-                    MUSIC_VOLUME = max(0.0, min(1.0, music_volume))
-                    pygame.mixer.music.set_volume(MUSIC_VOLUME)
-                if adjusting_sfx:
-                    mouse_x = event.pos[0]
-                    sfx_volume = (mouse_x - sfx_slider.x) / slider_width
-                    SFX_VOLUME = max(0.0, min(1.0, sfx_volume))
-                    CRASH_SOUND.set_volume(SFX_VOLUME)
-                    EASTER_EGG_SOUND.set_volume(SFX_VOLUME)
-
-        CLOCK.tick(FPS)
-
-def confirmation_dialog(message):
-    # Create overlay
-    overlay = pygame.Surface((WIDTH, HEIGHT))
-    overlay.set_alpha(180)
-    overlay.fill((0, 0, 0))
-
-    # Buttons
-    button_width = 150
-    button_height = 50
-    yes_button = pygame.Rect((WIDTH // 2 - button_width - 10, HEIGHT // 2 + 50), (button_width, button_height))
-    no_button = pygame.Rect((WIDTH // 2 + 10, HEIGHT // 2 + 50), (button_width, button_height))
-
-    confirming = True
-    while confirming:
-        WIN.blit(overlay, (0, 0))
-        draw_text(message, INSTRUCTION_FONT, WHITE, WIN, WIDTH // 2, HEIGHT // 2 - 50)
+class ConfirmScene(Scene):
+    idle = True
+
+    def __init__(self, message, on_confirm):
+        super().__init__()
+        self.message = message
+        self.on_confirm = on_confirm  # Called after the dialog closes with "Yes"
+
+        # Create overlay
+        self.overlay = pygame.Surface((WIDTH, HEIGHT))
+        self.overlay.set_alpha(180)
+        self.overlay.fill((0, 0, 0))
+        self.backdrop = None
+
+        # Buttons
+        button_width = 150
+        button_height = 50
+        self.yes_button = pygame.Rect((WIDTH // 2 - button_width - 10, HEIGHT // 2 + 50), (button_width, button_height))
+        self.no_button = pygame.Rect((WIDTH // 2 + 10, HEIGHT // 2 + 50), (button_width, button_height))
+
+    def enter(self):
+        self.backdrop = dimmed_screen(self.overlay)
+
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if self.yes_button.collidepoint(event.pos):
+                self.stack.pop()
+                self.on_confirm()
+            elif self.no_button.collidepoint(event.pos):
+                self.stack.pop()
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.stack.pop()
+
+    def draw(self, surface):
+        surface.blit(self.backdrop, (0, 0))
+        draw_text(self.message, INSTRUCTION_FONT, WHITE, surface, WIDTH // 2, HEIGHT // 2 - 50)
 
         # Draw buttons
-        pygame.draw.rect(WIN, WHITE, yes_button)
-        pygame.draw.rect(WIN, WHITE, no_button)
-        draw_text("Yes", BUTTON_FONT, (0, 0, 0), WIN, yes_button.centerx, yes_button.centery)
-        draw_text("No", BUTTON_FONT, (0, 0, 0), WIN, no_button.centerx, no_button.centery)
+        pygame.draw.rect(surface, WHITE, self.yes_button)
+        pygame.draw.rect(surface, WHITE, self.no_button)
+        draw_text("Yes", BUTTON_FONT, (0, 0, 0), surface, self.yes_button.centerx, self.yes_button.centery)
+        draw_text("No", BUTTON_FONT, (0, 0, 0), surface, self.no_button.centerx, self.no_button.centery)
 
         pygame.display.flip()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                confirming = False
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if yes_button.collidepoint(event.pos):
-                    return True
-                elif no_button.collidepoint(event.pos):
-                    return False
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    return False
+class MessageScene(Scene):
+    idle = True
 
-        CLOCK.tick(FPS)
+    def __init__(self, message, display_time=2):
+        super().__init__()
+        self.message = message
+        self.display_time = display_time  # seconds
+        self.start_time = None
+
+    def enter(self):
+        self.start_time = pygame.time.get_ticks()
 
-def show_message(message):
-    message_displayed = True
-    display_time = 2  # seconds
-    start_time = pygame.time.get_ticks()
+    def timeout(self):
+        return self.start_time + int(self.display_time * 1000) - pygame.time.get_ticks() + 1
 
-    while message_displayed:
-        elapsed_time = (pygame.time.get_ticks() - start_time) / 1000
-        if elapsed_time > display_time:
-            message_displayed = False
+    def update(self, dt):
+        elapsed_time = (pygame.time.get_ticks() - self.start_time) / 1000
+        if elapsed_time > self.display_time:
+            self.stack.pop()
 
-        WIN.blit(BACKGROUND_IMAGE, (0, 0))
-        draw_text(message, INSTRUCTION_FONT, WHITE, WIN, WIDTH // 2, HEIGHT // 2)
+    def draw(self, surface):
+        surface.blit(BACKGROUND_IMAGE, (0, 0))
+        draw_text(self.message, INSTRUCTION_FONT, WHITE, surface, WIDTH // 2, HEIGHT // 2)
         pygame.display.flip()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                message_displayed = False
-                pygame.quit()
-                sys.exit()
+class CountdownScene(Scene):
+    idle = True
 
-        CLOCK.tick(FPS)
+    def __init__(self, seconds=3):
+        super().__init__()
+        self.seconds = seconds
+        self.start_time = None
+        self.shown = None  # Number on screen
 
-def countdown():
-    for i in range(3, 0, -1):
-        WIN.blit(BACKGROUND_IMAGE, (0, 0))
-        draw_text(str(i), TITLE_FONT, YELLOW, WIN, WIDTH // 2, HEIGHT // 2)
-        pygame.display.flip()
-        pygame.time.delay(1000)  # Wait 1 second
-
-def game_over_screen(player):
-    pygame.mixer.music.stop()
-    draw_text("Game Over", TITLE_FONT, YELLOW, WIN, WIDTH // 2, HEIGHT // 2 - 50)
-    draw_text(f"Score: {player.score}", INSTRUCTION_FONT, WHITE, WIN, WIDTH // 2, HEIGHT // 2 + 20)
-    draw_text("Press 'R' to restart or 'Q' to quit", INSTRUCTION_FONT, WHITE, WIN, WIDTH // 2, HEIGHT // 2 + 60)
-    pygame.display.flip()
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                waiting = False
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_r:
-                    waiting = False
-                    main()
-                if event.key == pygame.K_q:
-                    pygame.quit()
-                    sys.exit()
-        CLOCK.tick(FPS)
+    def enter(self):
+        self.start_time = pygame.time.get_ticks()
 
-def main(game_state=None, easter_egg_activated=False):
-    # Start the game background music
-    pygame.mixer.music.load(GAME_MUSIC)
-    pygame.mixer.music.play(-1)
-    pygame.mixer.music.set_volume(MUSIC_VOLUME)
-    CRASH_SOUND.set_volume(SFX_VOLUME)
-    EASTER_EGG_SOUND.set_volume(SFX_VOLUME)
-
-    if game_state:
-        # Load player data
-        player_data = game_state['player']
-        player = Player(
-            x=player_data['x'],
-            y=player_data['y'],
-            speed=5,
-            lives=player_data['lives'],
-            score=player_data['score']
-        )
-
-        # Load obstacles data
-        obstacles = []
-        for obs_data in game_state['obstacles']:
-            obs = Obstacle()
-            obs.rect.centerx = obs_data['x']
-            obs.rect.centery = obs_data['y']
-            obs.speed = obs_data['speed']
-            obstacles.append(obs)
-
-        # Load obstacle_timer
-        obstacle_timer = game_state.get('obstacle_timer', 0)
-
-        # Display a message before resuming
-        show_message("Resuming saved game...")
-        countdown()
-    else:
-        # Initialize new game
-        player = Player(WIDTH // 2, HEIGHT - 60, speed=5)
-        obstacles = []
-        obstacle_timer = 0
-        if easter_egg_activated:
-            player.lives = 99  # Easter egg effect: give the player 99 lives
-
-    running = True
-    while running:
-        CLOCK.tick(FPS)
-        obstacle_timer += 1
+    def resume(self):
+        # Count from the start again after the message shown over it
+        self.start_time = pygame.time.get_ticks()
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    pause_menu(player, obstacles, obstacle_timer)
-
-        # Spawn a new obstacle every 60 frames (1 second at 60 FPS)
-        if obstacle_timer >= FPS:
-            obstacles.append(Obstacle())
-            obstacle_timer = 0
-
-        # Move and draw obstacles
-        for obstacle in obstacles[:]:
-            obstacle.move()
-            if obstacle.rect.top > HEIGHT:
-                obstacles.remove(obstacle)
-                player.score += 1  # Increase score when an obstacle passes by
-            elif obstacle.rect.colliderect(player.rect):
-                player.lives -= 1
-                CRASH_SOUND.play()
-                obstacles.remove(obstacle)
-                if player.lives == 0:
-                    game_over_screen(player)
-                    return
+    def remaining(self):
+        return self.seconds - (pygame.time.get_ticks() - self.start_time) // 1000
 
-        # Move the player
-        player.move()
+    def timeout(self):
+        # Until the next whole second
+        return 1000 - (pygame.time.get_ticks() - self.start_time) % 1000
 
-        # Draw everything
-        WIN.blit(BACKGROUND_IMAGE, (0, 0))
-        player.draw(WIN)
-        for obstacle in obstacles:
-            obstacle.draw(WIN)
+    def update(self, dt):
+        remaining = self.remaining()
+        if remaining <= 0:
+            self.stack.pop()
+        elif remaining != self.shown:
+            self.dirty = True
 
-        # Draw the score and lives
-        draw_text(f"Score: {player.score}", INSTRUCTION_FONT, WHITE, WIN, 80, 30)
-        draw_text(f"Lives: {player.lives}", INSTRUCTION_FONT, WHITE, WIN, WIDTH - 80, 30)
+    def draw(self, surface):
+        self.shown = self.remaining()
+        surface.blit(BACKGROUND_IMAGE, (0, 0))
+        draw_text(str(self.shown), TITLE_FONT, YELLOW, surface, WIDTH // 2, HEIGHT // 2)
+        pygame.display.flip()
 
+class GameOverScene(Scene):
+    idle = True
+
+    def __init__(self, player, run):
+        super().__init__()
+        self.player = player
+        self.run = run  # This game's Run, just handed to SCORE_WRITER
+        self.backdrop = None
+        self.leaderboard = []
+        self.best_today = None
+        self.percentile = None
+
+    def enter(self):
+        AUDIO.stop_music()
+        self.backdrop = WIN.copy()  # The last frame of the game
+
+        # Leaderboard for this run's mode. Runs the writer hasn't stored yet
+        # (this one included) are merged in by hand; a run the writer stores
+        # while we read can show up on both sides, so pending runs already
+        # stored (same finish time) are left out. Without the database only
+        # the pending runs are shown.
+        run = self.run
+        today = run_day(run.finished_at)
+        pending = [other for other in SCORE_WRITER.pending() if other.easter_egg == run.easter_egg]
+        try:
+            best = SCORES.top(LEADERBOARD_SIZE, easter_egg=run.easter_egg)
+            best_today = SCORES.top(1, day=today, easter_egg=run.easter_egg)
+            self.percentile = SCORES.percentile(run.score, easter_egg=run.easter_egg)
+        except sqlite3.Error:
+            best = []
+            best_today = []
+            self.percentile = None
+        stored = {other.finished_at for other in best + best_today}
+        pending = [other for other in pending if other.finished_at not in stored]
+        self.leaderboard = sorted(best + pending, key=lambda other: -other.score)[:LEADERBOARD_SIZE]
+        best_today += [other for other in pending if run_day(other.finished_at) == today]
+        self.best_today = max((other.score for other in best_today), default=run.score)
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_r:
+                self.stack.replace(PlayScene())
+            if event.key == pygame.K_q:
+                self.stack.clear()
+
+    def draw(self, surface):
+        surface.blit(self.backdrop, (0, 0))
+        draw_text("Game Over", TITLE_FONT, YELLOW, surface, WIDTH // 2, HEIGHT // 2 - 50)
+        draw_text(f"Score: {self.player.score}", INSTRUCTION_FONT, WHITE, surface, WIDTH // 2, HEIGHT // 2 + 20)
+        draw_text("Press 'R' to restart or 'Q' to quit", INSTRUCTION_FONT, WHITE, surface, WIDTH // 2, HEIGHT // 2 + 60)
+
+        # Where this run stands
+        if self.percentile is not None:
+            draw_text(f"Better than {self.percentile:.0f}% of runs  -  Best today: {self.best_today}",
+                      CREDIT_FONT, WHITE, surface, WIDTH // 2, HEIGHT // 2 + 105)
+        draw_text("High Scores", INSTRUCTION_FONT, YELLOW, surface, WIDTH // 2, HEIGHT // 2 + 150)
+        for idx, other in enumerate(self.leaderboard):
+            color = YELLOW if other == self.run else WHITE
+            finished = time.strftime('%Y-%m-%d', time.localtime(other.finished_at))
+            draw_text(f"{idx + 1}.  {other.score}   {finished}", CREDIT_FONT, color, surface,
+                      WIDTH // 2, HEIGHT // 2 + 190 + idx * 30)
         pygame.display.flip()
 
+class PlayScene(Scene):
+    fps = MAX_RENDER_FPS
+
+    def __init__(self, game_state=None, easter_egg_activated=False):
+        super().__init__()
+        self.game_state = game_state
+        self.easter_egg_activated = easter_egg_activated
+
+    def enter(self):
+        # Start the game background music
+        AUDIO.play_music("game")
+        AUDIO.set_music_volume(MUSIC_VOLUME)
+        AUDIO.set_sfx_volume(SFX_VOLUME)
+
+        # Seed the game's RNG explicitly so the session can be recorded
+        seed = random.randrange(2 ** 32)
+        if self.game_state:
+            self.state = self.game_state
+            self.state.rng.seed(seed)
+        else:
+            # Initialize new game
+            self.state = new_game(seed=seed, easter_egg_activated=self.easter_egg_activated)
+        self.game_state = None
+
+        # HUD labels, only re-rendered when the value changes
+        self.score_field = HudField(TEXT_CACHE, INSTRUCTION_FONT, WHITE, "Score: {}")
+        self.lives_field = HudField(TEXT_CACHE, INSTRUCTION_FONT, WHITE, "Lives: {}")
+        self.notice_field = HudField(TEXT_CACHE, PROFILER_FONT, WHITE, "{}")
+        self.notice = None  # (text, time.monotonic() to hide it at)
+        self.renderer = DirtyRenderer(WIN, BACKGROUND_IMAGE, enabled=DIRTY_RENDERING)
+        self.timestep = FixedTimestep(TICK_RATE)
+        self.profiler = FrameProfiler() if PROFILING else None
+        self.tracer = AllocationTracer() if TRACE_ALLOCATIONS else None
+        self.latency = LatencyProbe() if PROBE_LATENCY else None
+        self.capture = start_capture() if CAPTURE_FRAMES else None
+        self.recorder = Recorder(self.state, seed) if RECORD_REPLAYS else None
+        self.autosaver = AutoSaver(catalog=CATALOG) if AUTOSAVE else None
+        self.stars = Starfield(WIDTH, HEIGHT, GAME_STARFIELD)
+        self.debris = ParticleLayer(fade_sprites(2, DEBRIS_COLOR))
+        self.dt = 0.0
+        CONTROLS.refresh()
+        GAMEPLAY_GC.begin_play()
+
+    def exit(self):
+        # Game over or quitting
+        if self.profiler is not None:
+            self.profiler.dump(PROFILE_TRACE)
+        if self.tracer is not None:
+            self.tracer.dump(ALLOCATION_REPORT)
+            self.tracer.stop()
+        if self.latency is not None:
+            self.latency.dump(LATENCY_REPORT)
+        if self.capture is not None:
+            self.capture.close()
+        if self.recorder is not None:
+            save_replay(self.recorder, self.state)
+        if self.autosaver is not None:
+            self.autosaver.close()
+        GAMEPLAY_GC.end_play()
+
+    def pause(self):
+        # Something is shown over the game; collect while nothing moves
+        GAMEPLAY_GC.end_play()
+
+    def resume(self):
+        # Back from the pause menu or the countdown
+        self.renderer.invalidate()
+        self.timestep.reset()
+        CONTROLS.refresh()
+        if self.latency is not None:
+            self.latency.reset()
+        GAMEPLAY_GC.begin_play()
+        if self.profiler is not None:
+            self.profiler.begin_frame()  # Don't count the time spent paused
+
+    def begin_frame(self):
+        if self.profiler is not None:
+            self.profiler.begin_frame()
+        if self.tracer is not None:
+            self.tracer.next_frame()
+
+    def handle_event(self, event):
+        CONTROLS.handle_event(event)
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.stack.push(PauseScene(self.state))
+            if event.key == pygame.K_F3:
+                if self.profiler is None:
+                    self.profiler = FrameProfiler()
+                    self.profiler.begin_frame()
+                else:
+                    self.profiler.dump(PROFILE_TRACE)
+                    self.profiler = None
+                self.renderer.invalidate()
+            if event.key == pygame.K_F4:
+                if self.tracer is None:
+                    self.tracer = AllocationTracer()
+                else:
+                    self.tracer.dump(ALLOCATION_REPORT)
+                    self.tracer.stop()
+                    self.tracer = None
+            if event.key == pygame.K_F5:
+                if self.latency is None:
+                    self.latency = LatencyProbe()
+                else:
+                    self.latency.dump(LATENCY_REPORT)
+                    self.latency = None
+            if event.key == pygame.K_F6:
+                if self.capture is None:
+                    self.capture = start_capture()
+                    self.show_notice(f"Capturing to {self.capture.path}")
+                else:
+                    # Finishes in the background and reports when done
+                    self.show_notice(f"Saving capture to {self.capture.path}")
+                    self.capture.close(self.show_notice)
+                    self.capture = None
+
+    def show_notice(self, text):
+        # A line of text at the bottom of the screen for a few seconds; may
+        # be called from other threads
+        self.notice = (text, time.monotonic() + NOTICE_SECONDS)
+
+    def update(self, dt):
+        # Real time since the last frame, for the purely visual particles
+        self.dt = min(dt, self.timestep.max_frame_time)
+        state = self.state
+        profiler = self.profiler
+        ticks = self.timestep.advance()
+        GAMEPLAY_GC.tick()
+        # Sample input last, right before it is simulated
+        inputs = CONTROLS.sample()
+        if self.latency is not None:
+            self.latency.sampled(inputs, CONTROLS.last_poll)
+            if ticks:
+                self.latency.simulated()
+        if profiler is not None:
+            profiler.mark("events")
+
+        # Run as many fixed ticks as real time calls for: spawn, move
+        # obstacles, collide and move the player
+        for _ in range(ticks):
+            if self.recorder is not None:
+                self.recorder.record(inputs)
+            state = step(state, inputs, profiler)
+            if self.autosaver is not None:
+                self.autosaver.tick(state)
+            if state.hits:
+                AUDIO.play("crash")
+                self.debris.burst(self.stars.rng, DEBRIS_PARTICLES * state.hits, state.player.rect.centerx,
+                                  state.player.rect.centery, DEBRIS_SPEED, DEBRIS_LIFE)
+            if state.game_over:
+                run = Run(state.player.score, state.frame, self.easter_egg_activated, time.time())
+                SCORE_WRITER.submit(run)
+                self.stack.replace(GameOverScene(state.player, run))
+                return
+
+    def draw(self, surface):
+        state = self.state
+        renderer = self.renderer
+        profiler = self.profiler
+
+        # Draw everything in one Surface.blits() call: stars behind the
+        # sprites, debris in front
+        renderer.begin()
+        self.stars.update(self.dt)
+        sprites = self.stars.blit_sequence()
+        sprites.extend(game_sprites(state, self.timestep.alpha))
+        if len(self.debris):
+            self.debris.update(self.dt)
+            sprites.extend(self.debris.blit_sequence())
+        renderer.draw_many(sprites)
+        if profiler is not None:
+            profiler.mark("draw")
+
+        # Draw the score and lives
+        renderer.mark(self.score_field.draw(surface, state.player.score, 80, 30))
+        renderer.mark(self.lives_field.draw(surface, state.player.lives, WIDTH - 80, 30))
+        if profiler is not None:
+            renderer.mark(profiler.draw_overlay(surface, PROFILER_FONT, CLOCK.get_fps(), len(state.obstacles)))
+            profiler.mark("hud")
+        notice = self.notice
+        if notice is not None and time.monotonic() < notice[1]:
+            renderer.mark(self.notice_field.draw(surface, notice[0], WIDTH // 2, HEIGHT - 20))
+
+        renderer.present()
+        if self.capture is not None:
+            self.capture.capture()
+        if self.latency is not None:
+            self.latency.presented()
+        if profiler is not None:
+            profiler.mark("flip")
+            profiler.end_frame(len(state.obstacles), CLOCK.get_fps())
+
+class NetPlayScene(Scene):
+    # A networked match: netplay.NetClient does the talking and predicts
+    # our ship, this draws what it knows
+    fps = MAX_RENDER_FPS
+
+    def __init__(self, address, mode="versus"):
+        super().__init__()
+        self.address = address
+        self.mode = mode
+
+    def enter(self):
+        AUDIO.play_music("game")
+        self.client = NetClient(self.address, self.mode)
+        self.client.connect()
+        self.renderer = DirtyRenderer(WIN, BACKGROUND_IMAGE, enabled=DIRTY_RENDERING)
+        self.timestep = FixedTimestep(TICK_RATE)
+        self.stars = Starfield(WIDTH, HEIGHT, GAME_STARFIELD)
+        self.net_field = HudField(TEXT_CACHE, CREDIT_FONT, WHITE, "{}")
+        self.lives = None
+        self.dt = 0.0
+        CONTROLS.refresh()
+        GAMEPLAY_GC.begin_play()
+
+    def exit(self):
+        self.client.close()
+        GAMEPLAY_GC.end_play()
+
+    def handle_event(self, event):
+        CONTROLS.handle_event(event)
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            self.stack.clear()
+
+    def update(self, dt):
+        self.dt = min(dt, self.timestep.max_frame_time)
+        client = self.client
+        client.poll()
+        ticks = self.timestep.advance()
+        inputs = CONTROLS.sample()
+        for _ in range(ticks):
+            client.send_input(inputs)
+        client.link.flush()
+        GAMEPLAY_GC.tick()
+
+        if client.player is not None:
+            if self.lives is not None and client.player.lives < self.lives:
+                AUDIO.play("crash")
+            self.lives = client.player.lives
+        if client.full:
+            self.stack.replace(MessageScene("The server is full", display_time=3))
+        elif client.status == OVER:
+            ships = client.latest.players
+            if self.mode == "coop":
+                message = f"Game over! Team score: {sum(ship[3] for ship in ships)}"
+            else:
+                message = "You win!" if ships[client.slot][2] else "You lose!"
+            self.stack.replace(MessageScene(message, display_time=3))
+
+    def draw(self, surface):
+        client = self.client
+        renderer = self.renderer
+        renderer.begin()
+        self.stars.update(self.dt)
+        sprites = self.stars.blit_sequence()
+        ships, x, y = client.view()
+        sprites.extend(asteroid_sprites(x, y))
+        sprites.extend((PLAYER_SPRITE, (ship[0], ship[1])) for ship in ships if ship[2])
+        renderer.draw_many(sprites)
+
+        if client.status == WAITING:
+            text = "Connecting..." if client.match_id is None else "Waiting for another player..."
+            renderer.mark(self.net_field.draw(surface, text, WIDTH // 2, HEIGHT // 2))
+        else:
+            scores = "   ".join(f"P{i + 1}: {ship[3]} ({ship[2]} lives)" for i, ship in enumerate(ships))
+            renderer.mark(self.net_field.draw(surface, f"{scores}   {client.stats.summary()}", WIDTH // 2, 30))
+        renderer.present()
+
+def run(connect=None, mode="versus"):
+    # One loop drives every screen, starting from the start screen, or
+    # straight from a networked match with `connect` = (host, port)
+    stack = SceneStack()
+    if connect is None:
+        stack.push(StartScene())
+        if BINDINGS_WARNING is not None:
+            wait_for_assets()  # The message is drawn over the background image
+            stack.push(MessageScene(BINDINGS_WARNING, display_time=3))
+    else:
+        wait_for_assets()
+        stack.push(NetPlayScene(connect, mode))
+    stack.run(WIN, CLOCK)
+    SCORE_WRITER.close()
+    pygame.quit()
+
 # Start the game
-start_screen()
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Space Dodge")
+    parser.add_argument("--connect", metavar="HOST[:PORT]", help="play online against a netplay.py server")
+    parser.add_argument("--coop", action="store_true", help="online co-op instead of versus")
+    args = parser.parse_args()
+    address = None
+    if args.connect:
+        host, _, port = args.connect.partition(":")
+        address = (socket.gethostbyname(host), int(port or DEFAULT_PORT))
+    run(address, "coop" if args.coop else "versus")
@@ -0,0 +1,158 @@
+import gc
+import time
+import tracemalloc
+
+# Keeping the garbage collector out of gameplay, and finding out what still
+# allocates during a frame.
+#
+# Once the assets are loaded, freeze_heap() moves everything alive into the
+# permanent generation, so later collections never walk the modules, images
+# and caches again. GameplayGC then switches automatic collection off while
+# a game is being played and collects when it stops (pause, game over),
+# which is when a pause can't be felt. A minor collection still runs if an
+# unusual number of young objects piles up, so a long game can't grow
+# without bound.
+#
+# AllocationTracer is a diagnostic built on tracemalloc: at the end of each
+# frame it records every block allocated during the frame that is still
+# alive, grouped by the line that allocated it, plus the frame's peak
+# traced memory. In a steady state nothing should survive a frame; the
+# report shows what does and where it comes from.
+
+GEN0_LIMIT = 50000  # Young objects allowed during play before a minor collection
+WARMUP_FRAMES = 60  # Frames ignored while caches fill up
+REPORT_SITES = 20
+
+
+def freeze_heap():
+    gc.collect()
+    gc.freeze()
+
+
+class GameplayGC:
+    def __init__(self, gen0_limit=GEN0_LIMIT):
+        self.gen0_limit = gen0_limit
+        self.minor_collections = 0
+        self.collections = 0
+        self.last_collect_seconds = 0.0
+        self.playing = False
+
+    def begin_play(self):
+        gc.disable()
+        self.playing = True
+
+    def end_play(self):
+        # Collect now, while nothing is moving, and hand control back
+        if not self.playing:
+            return
+        self.playing = False
+        start = time.perf_counter()
+        gc.collect()
+        self.last_collect_seconds = time.perf_counter() - start
+        self.collections += 1
+        gc.enable()
+
+    def tick(self):
+        # Once per frame during play
+        if gc.get_count()[0] > self.gen0_limit:
+            gc.collect(0)
+            self.minor_collections += 1
+
+
+class AllocationTracer:
+    def __init__(self, depth=1, warmup_frames=WARMUP_FRAMES):
+        self.depth = depth  # Stack frames kept per allocation site
+        self.warmup_frames = warmup_frames
+        self.frames = 0
+        self.blocks = 0
+        self.size = 0
+        self.peak_total = 0
+        self.peak_max = 0
+        self.sites = {}  # traceback -> [blocks, bytes] summed over frames
+        self._seen = 0
+        self._in_frame = False
+        self._filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ]
+        tracemalloc.start(depth)
+
+    def begin_frame(self):
+        tracemalloc.clear_traces()
+        tracemalloc.reset_peak()
+        self._in_frame = True
+
+    def next_frame(self):
+        # End the frame in progress, if any, and start the next one; called
+        # from the top of the loop, so the locals of the last frame are gone
+        if self._in_frame:
+            self.end_frame()
+        self.begin_frame()
+
+    def end_frame(self):
+        self._in_frame = False
+        _, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(self._filters)
+        self._seen += 1
+        if self._seen <= self.warmup_frames:
+            return
+        self.frames += 1
+        self.peak_total += peak
+        self.peak_max = max(self.peak_max, peak)
+        for stat in snapshot.statistics("traceback"):
+            site = self.sites.setdefault(stat.traceback, [0, 0])
+            site[0] += stat.count
+            site[1] += stat.size
+            self.blocks += stat.count
+            self.size += stat.size
+
+    def report(self, top=REPORT_SITES):
+        if not self.frames:
+            return "No frames traced yet."
+        frames = self.frames
+        lines = [
+            f"{frames} frames traced: {self.blocks / frames:.1f} blocks / {self.size / frames:.0f} bytes "
+            f"still alive at the end of each frame; peak {self.peak_total / frames / 1024:.1f} KB "
+            f"per frame (max {self.peak_max / 1024:.1f} KB)",
+            f"{'blocks/frame':>13} {'bytes/frame':>12}  site",
+        ]
+        ranked = sorted(self.sites.items(), key=lambda item: -item[1][1])
+        for traceback, (blocks, size) in ranked[:top]:
+            where = " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in traceback)
+            lines.append(f"{blocks / frames:>13.2f} {size / frames:>12.1f}  {where}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            f.write(self.report() + "\n")
+
+    def stop(self):
+        tracemalloc.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+
+    import simulation
+
+    parser = argparse.ArgumentParser(description="Report per-frame allocations of the headless simulation.")
+    parser.add_argument("--frames", type=int, default=2000, help="frames to trace")
+    parser.add_argument("--obstacles", type=int, default=100, help="obstacles kept on screen")
+    parser.add_argument("--depth", type=int, default=1, help="stack frames per allocation site")
+    parser.add_argument("--seed", type=int, default=1, help="random seed")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    state = simulation.new_game(seed=args.seed)
+    state.player.lives = simulation.INVULNERABLE_LIVES
+    inputs = [simulation.random_inputs(rng) for _ in range(64)]
+    freeze_heap()
+    tracer = AllocationTracer(depth=args.depth)
+    for frame in range(args.frames + tracer.warmup_frames):
+        simulation.fill_obstacles(state, args.obstacles, rng)
+        tracer.begin_frame()
+        simulation.step(state, inputs[frame % len(inputs)])
+        tracer.end_frame()
+    tracer.stop()
+    print(tracer.report())
@@ -0,0 +1,775 @@
+import heapq
+import random
+import select
+import socket
+import struct
+import threading
+import time
+import zlib
+from collections import deque, namedtuple
+
+import numpy as np
+
+from obstacles import ObstacleStore
+from replay import DECODED_INPUTS, encode_inputs
+from simulation import WIDTH, HEIGHT, TICK_RATE, OBSTACLE_SIZE, WAVES, Player, spawn_obstacle
+from timing import FixedTimestep
+
+# Networked play: two players dodging the same obstacle field, over UDP.
+#
+# The server is authoritative. It steps every match at TICK_RATE and sends
+# each client a snapshot every SNAPSHOT_EVERY ticks; one server process
+# (one socket, one thread) hosts up to MAX_MATCHES matches. Clients only
+# send input and draw what the snapshots say, apart from their own ship,
+# which they predict.
+#
+# Snapshots are delta compressed against the last snapshot the client
+# acknowledged. Obstacles never change speed or leave their column, so the
+# ones that existed in the base snapshot are sent as one bit each (still
+# there or not) and the client moves them on by speed * ticks itself; only
+# obstacles spawned since the base go out in full. The snapshot carries a
+# CRC of the whole field, so a client notices if its copy ever diverges.
+# With no usable base the server sends everything.
+#
+# Input is numbered. Every input packet repeats the last INPUT_REDUNDANCY
+# inputs so a lost packet costs nothing, and the server applies each input
+# once, in order. Snapshots say which input the server got to, so the
+# client resets its ship to the server's position and replays the inputs
+# the server hasn't seen yet (prediction and reconciliation).
+#
+# Link wraps the sending side of a socket to add latency, jitter and
+# packet loss, so all of this can be exercised over loopback:
+#   python netplay.py server --port 5747
+#   python netplay.py loopback --matches 24 --latency 50 --jitter 10 --loss 0.05
+#
+# Packets start with magic, protocol version and type; all fields are
+# little endian:
+#   JOIN      mode, nonce                                  client -> server
+#   WELCOME   match id, slot, players per match, nonce     server -> client
+#   FULL      (no match free)                              server -> client
+#   INPUT     newest input number, count, acknowledged snapshot tick,
+#             client time (ms); then `count` input bytes, oldest first
+#   SNAPSHOT  tick, base tick, last input applied, echoed client time,
+#             status, players, field CRC, base obstacle count, new
+#             obstacle count; each player's x, y, lives, score; one bit per
+#             base obstacle; the new obstacles' x, y (int16) and speed
+#             (uint8) columns
+#   LEAVE                                                  client -> server
+
+DEFAULT_PORT = 5747
+PLAYERS_PER_MATCH = 2
+MAX_MATCHES = 64
+MODES = ("versus", "coop")
+SNAPSHOT_EVERY = 2  # Ticks between snapshots (30 a second)
+HISTORY = 64  # Snapshots kept as delta bases, ~2 seconds' worth
+INPUT_REDUNDANCY = 16  # Inputs repeated in every input packet
+INPUT_BUFFER = 4  # Queued inputs past which the server applies two a tick
+MAX_QUEUED_INPUTS = 64  # Inputs a connection may have waiting; older ones are dropped
+CLIENT_TIMEOUT = 5.0  # Seconds of silence before a client is dropped
+MATCH_LINGER = 3.0  # Seconds a finished match keeps sending its result
+JOIN_RETRY = 0.25  # Seconds between JOINs until the server answers
+MAX_DATAGRAM = 65507
+
+MAGIC = b"SN"
+PROTOCOL_VERSION = 1
+PACKET = struct.Struct("<2sBB")
+JOIN, WELCOME, FULL, INPUT, SNAPSHOT, LEAVE = range(1, 7)
+JOIN_BODY = struct.Struct("<BI")
+WELCOME_BODY = struct.Struct("<HBBI")
+INPUT_BODY = struct.Struct("<IBII")
+SNAPSHOT_BODY = struct.Struct("<IIIIBBIHH")
+PLAYER_STATE = struct.Struct("<hhHI")
+NO_BASE = 0xFFFFFFFF
+
+# Match status
+WAITING, PLAYING, OVER = range(3)
+
+Snapshot = namedtuple("Snapshot", [
+    "tick", "last_input", "status", "players", "x", "y", "speed", "received_at"
+])
+
+
+def clock_ms():
+    return int(time.perf_counter() * 1000) & 0xFFFFFFFF
+
+
+def field_checksum(x, y, speed):
+    checksum = zlib.crc32(x.astype(np.int32).tobytes())
+    checksum = zlib.crc32(y.astype(np.int32).tobytes(), checksum)
+    return zlib.crc32(speed.astype(np.int32).tobytes(), checksum)
+
+
+class NetStats:
+    # Traffic and round-trip counters for one end of a connection
+    def __init__(self):
+        self.packets_sent = 0
+        self.packets_received = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.lost = 0  # Packets known to be missing (gaps in numbering)
+        self.rtt = None  # Smoothed round trip (ms), as TCP does it
+        self.rtt_variation = 0.0
+        self.rtt_samples = []
+        self.in_rate = 0.0  # Bytes per second over the last second
+        self.out_rate = 0.0
+        self._window_start = time.perf_counter()
+        self._window_in = 0
+        self._window_out = 0
+
+    def sent(self, size):
+        self.packets_sent += 1
+        self.bytes_sent += size
+
+    def received(self, size):
+        self.packets_received += 1
+        self.bytes_received += size
+
+    def round_trip(self, ms):
+        if self.rtt is None:
+            self.rtt = ms
+            self.rtt_variation = ms / 2
+        else:
+            self.rtt_variation += (abs(self.rtt - ms) - self.rtt_variation) / 4
+            self.rtt += (ms - self.rtt) / 8
+        if len(self.rtt_samples) < 100000:
+            self.rtt_samples.append(ms)
+
+    def update(self):
+        # Roll the bandwidth window; call once a frame or tick
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.in_rate = (self.bytes_received - self._window_in) / elapsed
+            self.out_rate = (self.bytes_sent - self._window_out) / elapsed
+            self._window_start = now
+            self._window_in = self.bytes_received
+            self._window_out = self.bytes_sent
+
+    def summary(self):
+        rtt = "-" if self.rtt is None else f"{self.rtt:.0f}"
+        return f"RTT {rtt} ms  in {self.in_rate / 1024:.1f} KB/s  out {self.out_rate / 1024:.1f} KB/s"
+
+
+class Link:
+    # The sending side of a UDP socket, optionally with simulated latency
+    # (seconds, one way), jitter (+/- seconds, so packets can arrive out of
+    # order) and packet loss (0..1). Delayed packets go out from flush().
+    def __init__(self, sock, stats, latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.socket = sock
+        self.stats = stats
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.dropped = 0
+        self._queue = []  # Heap of (due, order, data, address)
+        self._order = 0
+
+    def sendto(self, data, address):
+        self.stats.sent(len(data))
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        if not self.latency and not self.jitter:
+            self._send(data, address)
+            return
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        heapq.heappush(self._queue, (time.perf_counter() + delay, self._order, data, address))
+        self._order += 1
+
+    def flush(self):
+        now = time.perf_counter()
+        queue = self._queue
+        while queue and queue[0][0] <= now:
+            _, _, data, address = heapq.heappop(queue)
+            self._send(data, address)
+
+    def next_due(self):
+        return self._queue[0][0] if self._queue else None
+
+    def _send(self, data, address):
+        try:
+            self.socket.sendto(data, address)
+        except OSError:
+            self.dropped += 1  # Full send buffer or unreachable; it's UDP
+
+
+def receive(sock, stats):
+    # Every datagram waiting on a non-blocking socket, as (data, address)
+    packets = []
+    while True:
+        try:
+            data, address = sock.recvfrom(MAX_DATAGRAM)
+        except (BlockingIOError, InterruptedError):
+            return packets
+        except ConnectionResetError:
+            continue  # ICMP port unreachable from an earlier send (Windows)
+        stats.received(len(data))
+        packets.append((data, address))
+
+
+def packet_type(data):
+    if len(data) < PACKET.size:
+        return None
+    magic, version, kind = PACKET.unpack_from(data)
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        return None
+    return kind
+
+
+class Match:
+    def __init__(self, match_id, mode, seed=None):
+        self.id = match_id
+        self.mode = mode
+        self.rng = random.Random(seed)
+        self.obstacles = ObstacleStore(*OBSTACLE_SIZE)
+        self.obstacle_timer = 0  # Position in the spawn timeline
+        self.tick = 0
+        self.players = []
+        self.clients = []  # Connection per player, same order
+        self.status = WAITING
+        self.ended_at = None
+        self.history = {}  # tick -> (ids, x, y, speed, next id) of each snapshot
+        self._history_ticks = deque()
+        self.checksum = 0
+
+    def add_player(self, client):
+        slot = len(self.players)
+        self.players.append(Player(WIDTH * (slot + 1) // (PLAYERS_PER_MATCH + 1), HEIGHT - 60))
+        self.clients.append(client)
+        if len(self.players) == PLAYERS_PER_MATCH:
+            self.status = PLAYING
+        return slot
+
+    def step(self, inputs):
+        # One tick. inputs[i] is the list of Inputs player i moves by this
+        # tick: usually one, none if the player's input hasn't arrived, two
+        # while the server catches up on a backlog.
+        self.tick += 1
+        self.obstacle_timer += 1
+        obstacles = self.obstacles
+        timeline = WAVES.timeline(max(player.score for player in self.players))
+        if self.obstacle_timer >= timeline.length:
+            self.obstacle_timer = 0
+        timeline.spawn(self.obstacle_timer, obstacles, self.rng, spawn_obstacle)
+
+        obstacles.move()
+        passed = obstacles.cull(HEIGHT)
+        for player in self.players:
+            if player.lives:
+                player.score += passed
+                hits = obstacles.collide(player.rect)
+                player.lives = max(0, player.lives - hits)
+        obstacles.compact()
+
+        for player, moves in zip(self.players, inputs):
+            if player.lives:
+                for move in moves:
+                    player.move(move)
+
+        remaining = sum(1 for player in self.players if player.lives)
+        if remaining == 0 or (self.mode == "versus" and remaining == 1):
+            self.status = OVER
+
+    def record(self):
+        # Keep the current field as a delta base for later snapshots
+        if self.tick in self.history:
+            return
+        obstacles = self.obstacles
+        n = len(obstacles)
+        x, y, speed = obstacles.x[:n].copy(), obstacles.y[:n].copy(), obstacles.speed[:n].copy()
+        self.history[self.tick] = (obstacles.ids[:n].copy(), x, y, speed, obstacles.next_id)
+        self._history_ticks.append(self.tick)
+        while len(self._history_ticks) > HISTORY:
+            del self.history[self._history_ticks.popleft()]
+        self.checksum = field_checksum(x, y, speed)
+
+    def encode_snapshot(self, base_tick, last_input, echo):
+        # SNAPSHOT packet of the last recorded field against `base_tick`;
+        # returns (packet, True if it's a delta)
+        ids, x, y, speed, _ = self.history[self.tick]
+        base = self.history.get(base_tick) if base_tick != self.tick else None
+        if base is None:
+            base_tick = NO_BASE
+            base_count = 0
+            kept = b""
+            new = slice(None)
+        else:
+            base_ids, _, _, _, base_next_id = base
+            base_count = len(base_ids)
+            kept = np.packbits(np.isin(base_ids, ids, assume_unique=True)).tobytes()
+            new = ids >= base_next_id
+        added_x = x[new]
+        parts = [
+            PACKET.pack(MAGIC, PROTOCOL_VERSION, SNAPSHOT),
+            SNAPSHOT_BODY.pack(self.tick, base_tick, last_input, echo, self.status, len(self.players),
+                               self.checksum, base_count, len(added_x)),
+        ]
+        for player in self.players:
+            parts.append(PLAYER_STATE.pack(player.rect.x, player.rect.y, player.lives, player.score))
+        parts.append(kept)
+        parts.append(added_x.astype("<i2").tobytes())
+        parts.append(y[new].astype("<i2").tobytes())
+        parts.append(speed[new].astype(np.uint8).tobytes())
+        return b"".join(parts), base_tick != NO_BASE
+
+
+class Connection:
+    # A client as the server sees it
+    def __init__(self, address, nonce):
+        self.address = address
+        self.nonce = nonce
+        self.match = None
+        self.slot = None
+        self.inputs = deque(maxlen=MAX_QUEUED_INPUTS)  # Input bytes received but not applied yet
+        self.newest_input = 0  # Number of the newest input received
+        self.applied_input = 0  # ... and of the last one applied
+        self.lost_inputs = 0  # Inputs that never arrived
+        self.ack = NO_BASE  # Newest snapshot tick the client has
+        self.echo = 0  # Client time of its newest input packet
+        self.echo_at = 0.0  # When that packet arrived
+        self.last_heard = time.perf_counter()
+
+
+class Server:
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, max_matches=MAX_MATCHES,
+                 latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        self.max_matches = max_matches
+        self.stats = NetStats()
+        self.link = Link(self.socket, self.stats, latency, jitter, loss, seed)
+        self.rng = random.Random(seed)
+        self.matches = {}  # id -> Match
+        self.connections = {}  # address -> Connection
+        self.matches_hosted = 0
+        self.ticks = 0
+        self.tick_seconds = 0.0
+        self.max_tick_seconds = 0.0
+        self.delta_snapshots = 0
+        self.full_snapshots = 0
+        self.snapshot_bytes = 0
+        self._next_match_id = 1
+        self._stopped = threading.Event()
+
+    def poll(self):
+        for data, address in receive(self.socket, self.stats):
+            kind = packet_type(data)
+            if kind == JOIN:
+                self._join(data, address)
+            elif kind == INPUT:
+                self._input(data, address)
+            elif kind == LEAVE:
+                self._drop(address)
+
+    def _join(self, data, address):
+        if len(data) < PACKET.size + JOIN_BODY.size:
+            return
+        mode, nonce = JOIN_BODY.unpack_from(data, PACKET.size)
+        connection = self.connections.get(address)
+        if connection is None:
+            if mode >= len(MODES):
+                return
+            match = next((match for match in self.matches.values()
+                          if match.status == WAITING and match.mode == MODES[mode]), None)
+            if match is None:
+                if len(self.matches) >= self.max_matches:
+                    self.link.sendto(PACKET.pack(MAGIC, PROTOCOL_VERSION, FULL), address)
+                    return
+                # Ids wrap around; skip the ones of matches still running
+                while self._next_match_id in self.matches:
+                    self._next_match_id = self._next_match_id % 0xFFFF + 1
+                match = Match(self._next_match_id, MODES[mode], self.rng.getrandbits(32))
+                self.matches[match.id] = match
+                self._next_match_id = self._next_match_id % 0xFFFF + 1
+                self.matches_hosted += 1
+            connection = Connection(address, nonce)
+            connection.match = match
+            connection.slot = match.add_player(connection)
+            self.connections[address] = connection
+        # Answer repeated JOINs too, in case the WELCOME was lost
+        connection.last_heard = time.perf_counter()
+        self.link.sendto(PACKET.pack(MAGIC, PROTOCOL_VERSION, WELCOME) + WELCOME_BODY.pack(
+            connection.match.id, connection.slot, PLAYERS_PER_MATCH, connection.nonce), address)
+
+    def _input(self, data, address):
+        connection = self.connections.get(address)
+        if connection is None or len(data) < PACKET.size + INPUT_BODY.size:
+            return
+        newest, count, ack, sent_at = INPUT_BODY.unpack_from(data, PACKET.size)
+        inputs = data[PACKET.size + INPUT_BODY.size:PACKET.size + INPUT_BODY.size + count]
+        connection.last_heard = time.perf_counter()
+        if newest > connection.newest_input and inputs:
+            oldest = newest - len(inputs) + 1
+            if oldest > connection.newest_input + 1:
+                connection.lost_inputs += oldest - connection.newest_input - 1
+            for number, byte in zip(range(oldest, newest + 1), inputs):
+                if number > connection.newest_input:
+                    connection.inputs.append((number, byte))
+            connection.newest_input = newest
+        if ack != NO_BASE and (connection.ack == NO_BASE or ack > connection.ack):
+            connection.ack = ack
+        connection.echo = sent_at
+        connection.echo_at = connection.last_heard
+
+    def _drop(self, address):
+        connection = self.connections.pop(address, None)
+        if connection is not None:
+            match = connection.match
+            match.players[connection.slot].lives = 0  # Leaving forfeits
+            match.clients[connection.slot] = None
+            if match.status == WAITING:
+                del self.matches[match.id]  # Nobody else in it yet
+
+    def tick(self):
+        start = time.perf_counter()
+        self.ticks += 1
+        for match in self.matches.values():
+            if match.status != PLAYING:
+                continue
+            inputs = []
+            for connection in match.clients:
+                moves = []
+                if connection is not None and connection.inputs:
+                    for _ in range(2 if len(connection.inputs) > INPUT_BUFFER else 1):
+                        number, byte = connection.inputs.popleft()
+                        moves.append(DECODED_INPUTS[byte])
+                        connection.applied_input = number
+                inputs.append(moves)
+            match.step(inputs)
+            if match.status == OVER:
+                match.ended_at = start
+
+        if self.ticks % SNAPSHOT_EVERY == 0:
+            self._send_snapshots(start)
+            self._expire(start)
+        self.link.flush()
+        self.stats.update()
+        elapsed = time.perf_counter() - start
+        self.tick_seconds += elapsed
+        self.max_tick_seconds = max(self.max_tick_seconds, elapsed)
+
+    def _send_snapshots(self, now):
+        for match in self.matches.values():
+            match.record()
+            for connection in match.clients:
+                if connection is None:
+                    continue
+                # Echo the client's clock minus how long its packet sat here,
+                # so the round trip it measures is just the network
+                echo = (connection.echo + int((now - connection.echo_at) * 1000)) & 0xFFFFFFFF
+                packet, delta = match.encode_snapshot(connection.ack, connection.applied_input, echo)
+                self.link.sendto(packet, connection.address)
+                self.snapshot_bytes += len(packet)
+                if delta:
+                    self.delta_snapshots += 1
+                else:
+                    self.full_snapshots += 1
+
+    def _expire(self, now):
+        for connection in list(self.connections.values()):
+            if now - connection.last_heard > CLIENT_TIMEOUT:
+                self._drop(connection.address)
+        for match in list(self.matches.values()):
+            finished = match.ended_at is not None and now - match.ended_at > MATCH_LINGER
+            if finished or all(client is None for client in match.clients):
+                for connection in match.clients:
+                    if connection is not None:
+                        self.connections.pop(connection.address, None)
+                del self.matches[match.id]
+
+    def run(self, seconds=None):
+        # Serve at TICK_RATE until stop() or `seconds` have passed
+        timestep = FixedTimestep(TICK_RATE)
+        end = None if seconds is None else time.perf_counter() + seconds
+        while not self._stopped.is_set() and (end is None or time.perf_counter() < end):
+            for _ in range(timestep.advance()):
+                self.poll()
+                self.tick()
+            # Sleep until the next tick, a delayed packet is due or a packet arrives
+            wake = time.perf_counter() + timestep.dt * (1 - timestep.alpha)
+            due = self.link.next_due()
+            if due is not None:
+                wake = min(wake, due)
+            select.select([self.socket], [], [], max(0.0, wake - time.perf_counter()))
+            self.poll()
+            self.link.flush()
+        self.socket.close()
+
+    def stop(self):
+        self._stopped.set()
+
+    def report(self):
+        snapshots = self.delta_snapshots + self.full_snapshots
+        lines = [
+            f"server: {self.matches_hosted} matches hosted, {self.ticks} ticks, "
+            f"tick {self.tick_seconds / max(self.ticks, 1) * 1000:.2f} ms avg / {self.max_tick_seconds * 1000:.2f} ms max",
+            f"        {snapshots} snapshots ({self.delta_snapshots} delta), "
+            f"{self.snapshot_bytes / max(snapshots, 1):.0f} bytes avg, {self.link.dropped} packets dropped by the link",
+        ]
+        return "\n".join(lines)
+
+
+class NetClient:
+    def __init__(self, server_address, mode="versus", latency=0.0, jitter=0.0, loss=0.0, seed=None):
+        # Resolved, so it compares equal to the source address of replies
+        self.server_address = (socket.gethostbyname(server_address[0]), int(server_address[1]))
+        self.mode = mode
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("", 0))
+        self.socket.setblocking(False)
+        self.stats = NetStats()
+        self.link = Link(self.socket, self.stats, latency, jitter, loss, seed)
+        self.nonce = random.getrandbits(32)
+        self.match_id = None
+        self.slot = None
+        self.players_per_match = PLAYERS_PER_MATCH
+        self.full = False  # The server had no room
+        self.player = None  # Our ship as predicted locally
+        self.latest = None  # Newest Snapshot
+        self.input_number = 0
+        self.pending = deque()  # (number, input byte, predicted x, y) not yet applied by the server
+        self.corrections = 0  # Times the prediction disagreed with the server
+        self.desyncs = 0  # Snapshots whose field didn't match its checksum
+        self.undecodable = 0  # Deltas against a base we don't have
+        self.stale = 0  # Snapshots older than one already received
+        self.malformed = 0  # Packets too short or inconsistent to use
+        self._bases = {}  # tick -> (x, y, speed) of received snapshots
+        self._last_join = None
+
+    @property
+    def status(self):
+        return WAITING if self.latest is None else self.latest.status
+
+    def connect(self):
+        self._last_join = time.perf_counter()
+        self.link.sendto(PACKET.pack(MAGIC, PROTOCOL_VERSION, JOIN)
+                         + JOIN_BODY.pack(MODES.index(self.mode), self.nonce), self.server_address)
+
+    def close(self):
+        if self.socket is None:
+            return
+        if self.match_id is not None:
+            # Straight out, bypassing the link's delay
+            try:
+                self.socket.sendto(PACKET.pack(MAGIC, PROTOCOL_VERSION, LEAVE), self.server_address)
+            except OSError:
+                pass
+        self.socket.close()
+        self.socket = None
+
+    def poll(self):
+        # Handle everything received, and keep knocking until welcomed
+        if self.match_id is None and not self.full and time.perf_counter() - self._last_join > JOIN_RETRY:
+            self.connect()
+        for data, address in receive(self.socket, self.stats):
+            if address != self.server_address:
+                continue  # Only the server gets a say
+            kind = packet_type(data)
+            if kind == SNAPSHOT and self.match_id is not None:
+                self._snapshot(data)
+            elif kind == WELCOME and self.match_id is None:
+                if len(data) < PACKET.size + WELCOME_BODY.size:
+                    self.malformed += 1
+                    continue
+                match_id, slot, players, nonce = WELCOME_BODY.unpack_from(data, PACKET.size)
+                if nonce == self.nonce and slot < players:
+                    self.match_id, self.slot, self.players_per_match = match_id, slot, players
+            elif kind == FULL and self.match_id is None:
+                self.full = True
+        self.link.flush()
+        self.stats.update()
+
+    def send_input(self, inputs):
+        # Once per tick: predict our move and send it along with the inputs
+        # the server hasn't confirmed yet. Outside play (waiting, out of
+        # lives) this just keeps the connection alive and acknowledges
+        # snapshots.
+        if self.match_id is None:
+            return
+        recent = b""
+        if self.status == PLAYING and self.player is not None and self.player.lives:
+            self.input_number += 1
+            byte = encode_inputs(inputs)
+            self.player.move(inputs)
+            self.pending.append((self.input_number, byte, self.player.rect.x, self.player.rect.y))
+            recent = bytes(entry[1] for entry in list(self.pending)[-INPUT_REDUNDANCY:])
+        ack = self.latest.tick if self.latest is not None else NO_BASE
+        self.link.sendto(PACKET.pack(MAGIC, PROTOCOL_VERSION, INPUT)
+                         + INPUT_BODY.pack(self.input_number, len(recent), ack, clock_ms()) + recent,
+                         self.server_address)
+
+    def _snapshot(self, data):
+        offset = PACKET.size
+        if len(data) < offset + SNAPSHOT_BODY.size:
+            self.malformed += 1
+            return
+        (tick, base_tick, last_input, echo, status, players, checksum,
+         base_count, added) = SNAPSHOT_BODY.unpack_from(data, offset)
+        kept_bytes = (base_count + 7) // 8 if base_tick != NO_BASE else 0
+        size = offset + SNAPSHOT_BODY.size + players * PLAYER_STATE.size + kept_bytes + 5 * added
+        if len(data) != size or status > OVER or self.slot >= players:
+            self.malformed += 1
+            return
+        latest = self.latest
+        if latest is not None and (tick < latest.tick or (tick == latest.tick and status <= latest.status)):
+            self.stale += 1  # Reordered, or nothing new
+            return
+        self.stats.round_trip((clock_ms() - echo) & 0xFFFFFFFF)
+        if self.latest is not None and self.latest.status == PLAYING and tick > self.latest.tick + SNAPSHOT_EVERY:
+            self.stats.lost += (tick - self.latest.tick) // SNAPSHOT_EVERY - 1
+        offset += SNAPSHOT_BODY.size
+        states = [PLAYER_STATE.unpack_from(data, offset + i * PLAYER_STATE.size) for i in range(players)]
+        offset += players * PLAYER_STATE.size
+
+        # Rebuild the field: surviving base obstacles moved on, then the new ones
+        if base_tick != NO_BASE:
+            base = self._bases.get(base_tick)
+            if base is None or len(base[0]) != base_count:
+                self.undecodable += 1
+                return
+            kept = np.unpackbits(np.frombuffer(data, np.uint8, kept_bytes, offset), count=base_count).astype(bool)
+            offset += kept_bytes
+            base_x, base_y, base_speed = base
+            old_x = base_x[kept]
+            old_speed = base_speed[kept]
+            old_y = base_y[kept] + old_speed * (tick - base_tick)
+        else:
+            old_x = old_y = old_speed = np.empty(0, dtype=np.int32)
+        new_x = np.frombuffer(data, "<i2", added, offset).astype(np.int32)
+        new_y = np.frombuffer(data, "<i2", added, offset + 2 * added).astype(np.int32)
+        new_speed = np.frombuffer(data, np.uint8, added, offset + 4 * added).astype(np.int32)
+        x = np.concatenate((old_x, new_x))
+        y = np.concatenate((old_y, new_y))
+        speed = np.concatenate((old_speed, new_speed))
+        if field_checksum(x, y, speed) != checksum:
+            self.desyncs += 1
+            return
+
+        self._bases[tick] = (x, y, speed)
+        for old in [t for t in self._bases if t < tick - HISTORY * SNAPSHOT_EVERY]:
+            del self._bases[old]
+        self.latest = Snapshot(tick, last_input, status, states, x, y, speed, time.perf_counter())
+        self._reconcile(states[self.slot], last_input)
+
+    def _reconcile(self, state, last_input):
+        # Take the server's word for where we were after `last_input`, then
+        # replay the inputs it hasn't applied yet
+        x, y, lives, score = state
+        if self.player is None:
+            self.player = Player(0, 0)
+        player = self.player
+        predicted = None
+        while self.pending and self.pending[0][0] <= last_input:
+            predicted = self.pending.popleft()
+        if predicted is not None and predicted[0] == last_input and (predicted[2], predicted[3]) != (x, y):
+            self.corrections += 1
+        player.rect.topleft = (x, y)
+        player.lives = lives
+        player.score = score
+        replayed = deque()
+        for number, byte, _, _ in self.pending:
+            player.move(DECODED_INPUTS[byte])
+            replayed.append((number, byte, player.rect.x, player.rect.y))
+        self.pending = replayed
+
+    def view(self):
+        # (ships as (x, y, lives, score) with ours predicted, obstacle x, y)
+        # for drawing, with obstacles moved on to where the server has them now
+        snapshot = self.latest
+        if snapshot is None:
+            return [], np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        ships = list(snapshot.players)
+        if self.player is not None:
+            ships[self.slot] = (self.player.rect.x, self.player.rect.y, self.player.lives, self.player.score)
+        ticks = 0
+        if snapshot.status == PLAYING:
+            ticks = min(int((time.perf_counter() - snapshot.received_at) * TICK_RATE), HISTORY)
+        return ships, snapshot.x, snapshot.y + snapshot.speed * ticks
+
+    def report(self):
+        rtts = sorted(self.stats.rtt_samples)
+        p95 = rtts[min(len(rtts) - 1, int(len(rtts) * 0.95))] if rtts else 0
+        return (f"match {self.match_id} slot {self.slot}: {self.stats.summary()}, RTT p95 {p95} ms, "
+                f"{self.stats.lost} snapshots lost, {self.corrections} corrections, "
+                f"{self.desyncs} desyncs, {self.undecodable} undecodable, {self.malformed} malformed")
+
+
+def run_loopback(matches, seconds, latency=0.0, jitter=0.0, loss=0.0, mode="versus", seed=None):
+    # A server in a thread and 2 * `matches` bots holding random inputs,
+    # all over 127.0.0.1 through impaired links. Returns (server, clients).
+    rng = random.Random(seed)
+    server = Server(port=0, latency=latency, jitter=jitter, loss=loss, seed=rng.getrandbits(32))
+    thread = threading.Thread(target=server.run, name="server", daemon=True)
+    thread.start()
+    clients = [NetClient(server.address, mode, latency, jitter, loss, rng.getrandbits(32))
+               for _ in range(matches * PLAYERS_PER_MATCH)]
+    held = [(DECODED_INPUTS[0], 0)] * len(clients)
+    for client in clients:
+        client.connect()
+
+    timestep = FixedTimestep(TICK_RATE)
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        for _ in range(timestep.advance()):
+            for i, client in enumerate(clients):
+                client.poll()
+                inputs, ticks = held[i]
+                if ticks == 0:
+                    inputs, ticks = rng.choice(DECODED_INPUTS), rng.randint(5, 30)
+                held[i] = (inputs, ticks - 1)
+                client.send_input(inputs)
+        time.sleep(max(0.0, timestep.dt * (1 - timestep.alpha)))
+    for client in clients:
+        client.close()
+    server.stop()
+    thread.join()
+    return server, clients
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Space Dodge network server and loopback test.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("server", help="host matches until interrupted")
+    serve.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT, help="UDP port")
+    serve.add_argument("--matches", type=int, default=MAX_MATCHES, help="matches hosted at once")
+    loopback = commands.add_parser("loopback", help="server and bot clients over 127.0.0.1")
+    loopback.add_argument("--matches", type=int, default=24, help="matches to fill with bots")
+    loopback.add_argument("--seconds", type=float, default=10, help="how long to play")
+    loopback.add_argument("--latency", type=float, default=50, help="one-way latency (ms)")
+    loopback.add_argument("--jitter", type=float, default=10, help="latency jitter (+/- ms)")
+    loopback.add_argument("--loss", type=float, default=0.05, help="packet loss (0..1)")
+    loopback.add_argument("--mode", choices=MODES, default="versus")
+    loopback.add_argument("--seed", type=int, default=None, help="random seed")
+    args = parser.parse_args()
+
+    if args.command == "server":
+        server = Server(args.host, args.port, args.matches)
+        print(f"Serving on {server.address[0]}:{server.address[1]}")
+        try:
+            server.run()
+        except KeyboardInterrupt:
+            pass
+        print(server.report())
+    else:
+        server, clients = run_loopback(args.matches, args.seconds, args.latency / 1000, args.jitter / 1000,
+                                       args.loss, args.mode, args.seed)
+        print(server.report())
+        rtts = sorted(ms for client in clients for ms in client.stats.rtt_samples)
+        received = sum(client.stats.bytes_received for client in clients)
+        sent = sum(client.stats.bytes_sent for client in clients)
+        print(f"clients: {len(clients)}, {sum(client.match_id is not None for client in clients)} joined, "
+              f"RTT p50 {rtts[len(rtts) // 2] if rtts else 0} ms / p95 {rtts[int(len(rtts) * 0.95)] if rtts else 0} ms, "
+              f"{received / len(clients) / args.seconds / 1024:.2f} KB/s in and "
+              f"{sent / len(clients) / args.seconds / 1024:.2f} KB/s out per client")
+        print(f"         {sum(client.stats.lost for client in clients)} snapshots lost, "
+              f"{sum(client.corrections for client in clients)} corrections, "
+              f"{sum(client.desyncs for client in clients)} desyncs, "
+              f"{sum(client.undecodable for client in clients)} undecodable, "
+              f"{sum(client.stale for client in clients)} stale, "
+              f"{sum(client.malformed for client in clients)} malformed")
@@ -0,0 +1,143 @@
+import numpy as np
+
+# Structure-of-arrays storage for obstacles. Every obstacle is a row across
+# the x/y/speed/alive columns, so moving, culling and colliding the whole
+# field is a handful of NumPy operations per frame instead of a Python loop
+# over Rect objects. x/y are the top-left corner, like pygame.Rect.
+#
+# The columns double as an obstacle pool: compact() packs the live rows to
+# the front and spawns write into the free rows behind them, and capacity
+# only ever grows, so once a game has reached its densest wave spawning and
+# despawning allocate nothing. cull() and collide() build their masks in
+# scratch columns of the same capacity, so a frame with no spawns and no
+# deaths doesn't allocate any arrays either.
+#
+# Every obstacle also gets an id, counting up from 0 in spawn order. Rows
+# stay in spawn order, so the ids column is always sorted; the network
+# server uses it to tell which obstacles of an earlier snapshot survived.
+
+INITIAL_CAPACITY = 64
+
+
+class ObstacleStore:
+    def __init__(self, width, height, capacity=INITIAL_CAPACITY):
+        self.width = width
+        self.height = height
+        self.count = 0
+        self.next_id = 0
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        self.x = np.zeros(capacity, dtype=np.int32)
+        self.y = np.zeros(capacity, dtype=np.int32)
+        self.speed = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self._mask = np.zeros(capacity, dtype=bool)
+        self._test = np.zeros(capacity, dtype=bool)
+
+    def _reserve(self, needed):
+        capacity = len(self.x)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        n = self.count
+        old = (self.x, self.y, self.speed, self.alive, self.ids)
+        self._allocate(capacity)
+        for new_column, old_column in zip((self.x, self.y, self.speed, self.alive, self.ids), old):
+            new_column[:n] = old_column[:n]
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.alive[:self.count] = False
+        self.count = 0
+
+    def spawn(self, centerx, centery, speed):
+        self._reserve(self.count + 1)
+        i = self.count
+        self.x[i] = centerx - self.width // 2
+        self.y[i] = centery - self.height // 2
+        self.speed[i] = speed
+        self.alive[i] = True
+        self.ids[i] = self.next_id
+        self.next_id += 1
+        self.count += 1
+
+    def extend(self, centerx, centery, speed):
+        # Bulk spawn from equally sized sequences/arrays of centers and speeds
+        centerx = np.asarray(centerx, dtype=np.int32)
+        added = len(centerx)
+        self._reserve(self.count + added)
+        start, end = self.count, self.count + added
+        self.x[start:end] = centerx - self.width // 2
+        self.y[start:end] = np.asarray(centery, dtype=np.int32) - self.height // 2
+        self.speed[start:end] = speed
+        self.alive[start:end] = True
+        self.ids[start:end] = np.arange(self.next_id, self.next_id + added)
+        self.next_id += added
+        self.count = end
+
+    def centers(self):
+        n = self.count
+        return self.x[:n] + self.width // 2, self.y[:n] + self.height // 2
+
+    def move(self):
+        n = self.count
+        self.y[:n] += self.speed[:n]
+
+    def cull(self, bottom):
+        # Kill every obstacle whose top edge is past `bottom`; returns how many
+        n = self.count
+        passed = np.greater(self.y[:n], bottom, out=self._mask[:n])
+        passed &= self.alive[:n]
+        self.alive[:n] ^= passed
+        return int(np.count_nonzero(passed))
+
+    def collide(self, rect):
+        # Kill every obstacle overlapping `rect` (same test as Rect.colliderect);
+        # returns how many
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        hit, test = self._mask[:n], self._test[:n]
+        np.less(x, rect.right, out=hit)
+        hit &= np.greater(x, rect.left - self.width, out=test)
+        hit &= np.less(y, rect.bottom, out=test)
+        hit &= np.greater(y, rect.top - self.height, out=test)
+        hit &= self.alive[:n]
+        self.alive[:n] ^= hit
+        return int(np.count_nonzero(hit))
+
+    def compact(self):
+        # Pack the live rows to the front, preserving spawn order
+        n = self.count
+        if np.count_nonzero(self.alive[:n]) == n:
+            return
+        keep = np.flatnonzero(self.alive[:n])
+        kept = len(keep)
+        for column in (self.x, self.y, self.speed, self.ids):
+            column[:kept] = column[keep]
+        self.alive[:kept] = True
+        self.alive[kept:n] = False
+        self.count = kept
+
+    def interpolated_y(self, alpha):
+        # Positions `alpha` (0..1) of the way through the last move, for
+        # drawing between simulation ticks
+        n = self.count
+        return self.y[:n] - (self.speed[:n] * (1.0 - alpha)).astype(np.int32)
+
+    def copy(self):
+        # An independent store holding just the live rows
+        n = self.count
+        clone = ObstacleStore(self.width, self.height, capacity=n)
+        clone.x[:n] = self.x[:n]
+        clone.y[:n] = self.y[:n]
+        clone.speed[:n] = self.speed[:n]
+        clone.alive[:n] = self.alive[:n]
+        clone.ids[:n] = self.ids[:n]
+        clone.next_id = self.next_id
+        clone.count = n
+        return clone
@@ -0,0 +1,137 @@
+import numpy as np
+import pygame
+
+# NumPy-backed particles. Positions, velocities and remaining life live in
+# arrays and are advanced in one vectorized pass; drawing hands the whole
+# layer to Surface.blits() with pre-rendered sprites, so nothing is drawn
+# with pygame.draw per particle. A Starfield stacks several wrapping layers
+# at different speeds for parallax; a ParticleLayer with finite lifetimes
+# gives bursts such as crash debris.
+
+DEBRIS_COLOR = (255, 170, 60)
+DEBRIS_FADE_STEPS = 8  # Pre-rendered alpha levels for fading particles
+
+
+def circle_sprite(radius, color, alpha=255):
+    sprite = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, (*color, alpha), (radius, radius), radius)
+    return sprite
+
+
+def fade_sprites(radius, color, steps=DEBRIS_FADE_STEPS):
+    # sprites[i] is drawn for particles with i/steps..(i+1)/steps life left
+    return [circle_sprite(radius, color, 255 * (i + 1) // steps) for i in range(steps)]
+
+
+class ParticleLayer:
+    def __init__(self, sprites, capacity=1024):
+        # `sprites` is one Surface, or a list faded by remaining life
+        self.sprites = sprites if isinstance(sprites, list) else [sprites]
+        self.offset = self.sprites[0].get_width() / 2  # Positions are centers
+        self.count = 0
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.max_life = np.ones(capacity, dtype=np.float32)
+
+    def __len__(self):
+        return self.count
+
+    def _reserve(self, needed):
+        capacity = len(self.x)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ("x", "y", "vx", "vy", "life", "max_life"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    def emit(self, x, y, vx, vy, life=np.inf):
+        # Add particles; each argument is a scalar or an array of one length
+        n = max(np.size(value) for value in (x, y, vx, vy, life))
+        self._reserve(self.count + n)
+        start, end = self.count, self.count + n
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.vx[start:end] = vx
+        self.vy[start:end] = vy
+        self.life[start:end] = life
+        self.max_life[start:end] = life
+        self.count = end
+
+    def burst(self, rng, count, x, y, speed, life):
+        # `count` particles flying out from (x, y) in random directions
+        angle = rng.uniform(0, 2 * np.pi, count)
+        velocity = rng.uniform(speed * 0.3, speed, count)
+        self.emit(x, y, np.cos(angle) * velocity, np.sin(angle) * velocity,
+                  rng.uniform(life * 0.5, life, count))
+
+    def update(self, dt):
+        n = self.count
+        self.x[:n] += self.vx[:n] * dt
+        self.y[:n] += self.vy[:n] * dt
+        self.life[:n] -= dt
+        dead = self.life[:n] <= 0
+        if dead.any():
+            keep = np.flatnonzero(~dead)
+            for column in (self.x, self.y, self.vx, self.vy, self.life, self.max_life):
+                column[:len(keep)] = column[keep]
+            self.count = len(keep)
+
+    def blit_sequence(self):
+        # (sprite, position) pairs for Surface.blits()
+        n = self.count
+        xs = (self.x[:n] - self.offset).astype(np.int32).tolist()
+        ys = (self.y[:n] - self.offset).astype(np.int32).tolist()
+        if len(self.sprites) == 1:
+            sprite = self.sprites[0]
+            return [(sprite, position) for position in zip(xs, ys)]
+        steps = len(self.sprites)
+        fade = np.minimum(self.life[:n] / self.max_life[:n] * steps, steps - 1).astype(np.int32)
+        sprites = self.sprites
+        return [(sprites[i], position) for i, position in zip(fade.tolist(), zip(xs, ys))]
+
+    def draw(self, surface):
+        # Returns the rects drawn
+        return surface.blits(self.blit_sequence())
+
+
+class Starfield:
+    # Layers of stars drifting down at different speeds, wrapping around to
+    # the top. Each entry of `layers` is (count, speed in px/s, radius,
+    # brightness 0-255); put the slow, dim, far layers first.
+    def __init__(self, width, height, layers, rng=None):
+        self.width = width
+        self.height = height
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.layers = []
+        for count, speed, radius, brightness in layers:
+            layer = ParticleLayer(circle_sprite(radius, (brightness,) * 3), capacity=count)
+            layer.emit(self.rng.uniform(0, width, count), self.rng.uniform(0, height, count), 0, speed)
+            self.layers.append(layer)
+
+    def __len__(self):
+        return sum(len(layer) for layer in self.layers)
+
+    def update(self, dt):
+        for layer in self.layers:
+            layer.update(dt)
+            n = layer.count
+            wrapped = layer.y[:n] > self.height
+            if wrapped.any():
+                layer.y[:n][wrapped] -= self.height
+                layer.x[:n][wrapped] = self.rng.uniform(0, self.width, int(wrapped.sum()))
+
+    def blit_sequence(self):
+        sequence = []
+        for layer in self.layers:
+            sequence.extend(layer.blit_sequence())
+        return sequence
+
+    def draw(self, surface):
+        return surface.blits(self.blit_sequence())
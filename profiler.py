@@ -0,0 +1,107 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+# Per-phase frame timing for the gameplay loop. Code calls mark(phase) at
+# the end of each phase; the time since the previous mark is added to that
+# phase for the current frame. Rolling percentiles feed an on-screen
+# overlay and every frame is kept for a CSV/JSON trace written at the end
+# of the session. The game loop only creates a profiler while profiling is
+# switched on, so when it's off the cost is a few `is not None` checks.
+
+PHASES = ("events", "spawn", "obstacles", "collision", "player", "draw", "hud", "flip")
+
+WINDOW_FRAMES = 300  # Frames the rolling percentiles are taken over
+MAX_TRACE_FRAMES = 100000
+OVERLAY_REFRESH = 15  # Frames between overlay text updates
+OVERLAY_BG = (0, 0, 0, 170)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    def __init__(self, window_frames=WINDOW_FRAMES, max_trace_frames=MAX_TRACE_FRAMES):
+        self.window = {phase: deque(maxlen=window_frames) for phase in PHASES + ("total",)}
+        self.max_trace_frames = max_trace_frames
+        self.trace = []
+        self.frames = 0
+        self._current = dict.fromkeys(PHASES, 0.0)
+        self._frame_start = 0.0
+        self._last = 0.0
+        self._overlay = None
+
+    def begin_frame(self):
+        self._frame_start = self._last = time.perf_counter()
+        for phase in PHASES:
+            self._current[phase] = 0.0
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self._current[phase] += now - self._last
+        self._last = now
+
+    def end_frame(self, entities, fps):
+        total = time.perf_counter() - self._frame_start
+        self.frames += 1
+        row = {'frame': self.frames}
+        for phase in PHASES:
+            ms = self._current[phase] * 1000
+            self.window[phase].append(ms)
+            row[phase] = round(ms, 4)
+        self.window["total"].append(total * 1000)
+        row['total'] = round(total * 1000, 4)
+        row['entities'] = entities
+        row['fps'] = round(fps, 1)
+        if len(self.trace) < self.max_trace_frames:
+            self.trace.append(row)
+
+    def summary(self):
+        # {phase: (p50, p95, p99)} in milliseconds over the rolling window
+        result = {}
+        for phase, values in self.window.items():
+            ordered = sorted(values)
+            result[phase] = (
+                percentile(ordered, 0.50),
+                percentile(ordered, 0.95),
+                percentile(ordered, 0.99),
+            )
+        return result
+
+    def draw_overlay(self, surface, font, fps, entities):
+        # Returns the rect drawn so the dirty renderer can restore it
+        if self._overlay is None or self.frames % OVERLAY_REFRESH == 0:
+            lines = [f"FPS {fps:.0f}  entities {entities}", "phase      p50    p95    p99 (ms)"]
+            for phase, (p50, p95, p99) in self.summary().items():
+                lines.append(f"{phase:<9}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+            rendered = [font.render(line, True, (255, 255, 255)) for line in lines]
+            width = max(text.get_width() for text in rendered) + 16
+            height = sum(text.get_height() for text in rendered) + 16
+            overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+            overlay.fill(OVERLAY_BG)
+            y = 8
+            for text in rendered:
+                overlay.blit(text, (8, y))
+                y += text.get_height()
+            self._overlay = overlay
+        return surface.blit(self._overlay, (10, 60))
+
+    def dump(self, path):
+        # Write the per-frame trace; .csv gives a table, anything else JSON
+        if path.endswith(".csv"):
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=['frame', *PHASES, 'total', 'entities', 'fps'])
+                writer.writeheader()
+                writer.writerows(self.trace)
+        else:
+            summary = {phase: dict(zip(("p50", "p95", "p99"), (round(v, 4) for v in values)))
+                       for phase, values in self.summary().items()}
+            with open(path, 'w') as f:
+                json.dump({'summary': summary, 'frames': self.trace}, f)
@@ -0,0 +1,64 @@
+import pygame
+
+# Dirty-rectangle rendering for the gameplay screen. Instead of blitting the
+# whole background and flipping every frame, only the areas drawn last
+# frame are restored from the background and only those plus this frame's
+# areas are pushed with pygame.display.update(rects). When the dirty area
+# gets large (lots of obstacles) a full blit + flip is cheaper, so the
+# renderer falls back to that automatically.
+
+# Fraction of the screen above which a full redraw is used instead
+FULL_REDRAW_RATIO = 0.35
+
+
+class DirtyRenderer:
+    def __init__(self, window, background, enabled=True, full_redraw_ratio=FULL_REDRAW_RATIO):
+        self.window = window
+        self.background = background
+        self.enabled = enabled
+        self.full_redraw_area = int(window.get_width() * window.get_height() * full_redraw_ratio)
+        self._previous = []
+        self._current = []
+        self._previous_area = 0
+        self._full = True
+        self.full_frames = 0
+        self.dirty_frames = 0
+
+    def invalidate(self):
+        # Something else drew over the window (menus, messages); redraw it all
+        self._full = True
+
+    def begin(self):
+        # Erase last frame's sprites, or the whole screen when that's cheaper
+        if not self.enabled or self._full or self._previous_area > self.full_redraw_area:
+            self._full = True
+            self.window.blit(self.background, (0, 0))
+        else:
+            background = self.background
+            blit = self.window.blit
+            for rect in self._previous:
+                blit(background, rect, rect)
+        self._current = []
+
+    def draw(self, image, position):
+        self._current.append(self.window.blit(image, position))
+
+    def draw_many(self, sequence):
+        # Batch of (image, position) pairs in one Surface.blits() call
+        self._current.extend(self.window.blits(sequence))
+
+    def mark(self, rect):
+        # Record an area drawn by someone else (HUD text etc.) as dirty
+        self._current.append(rect)
+
+    def present(self):
+        current = self._current
+        if self._full:
+            pygame.display.flip()
+            self.full_frames += 1
+        else:
+            pygame.display.update(self._previous + current)
+            self.dirty_frames += 1
+        self._previous = current
+        self._previous_area = sum(rect.w * rect.h for rect in current)
+        self._full = False
@@ -0,0 +1,128 @@
+import json
+import struct
+import time
+import zlib
+
+from simulation import Inputs, state_checksum, state_from_dict, state_to_dict, step
+
+# Session recording and replay. A game is fully determined by its starting
+# state, the seed of its RNG and the input held on every tick, so that's all
+# a recording stores:
+#
+#   header   magic, version, seed, length of the starting state JSON
+#   start    the starting state in the save-file dict layout (JSON)
+#   inputs   one byte per tick (left/right/up/down bits), zlib compressed
+#   footer   ticks, final score, final lives, state checksum
+#
+# Replaying steps the simulation headless and uncapped and checks the final
+# score/lives/checksum against the footer.
+
+MAGIC = b"SDRP"
+VERSION = 2  # 2: spawning follows the wave timelines
+HEADER = struct.Struct("<4sHQI")
+FOOTER = struct.Struct("<QqqI")
+
+LEFT, RIGHT, UP, DOWN = 1, 2, 4, 8
+
+# Every possible input byte decoded up front so replaying is a table lookup
+DECODED_INPUTS = [
+    Inputs(bool(bits & LEFT), bool(bits & RIGHT), bool(bits & UP), bool(bits & DOWN))
+    for bits in range(16)
+]
+
+
+def encode_inputs(inputs):
+    return (
+        (LEFT if inputs.left else 0) | (RIGHT if inputs.right else 0)
+        | (UP if inputs.up else 0) | (DOWN if inputs.down else 0)
+    )
+
+
+class Recorder:
+    def __init__(self, state, seed):
+        # Call before the first step; `seed` must be the one the state's RNG
+        # was created with
+        self.seed = seed
+        self.start = json.dumps(state_to_dict(state)).encode()
+        self.inputs = bytearray()
+
+    def record(self, inputs):
+        self.inputs.append(encode_inputs(inputs))
+
+    def save(self, path, state):
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.seed, len(self.start)))
+            f.write(self.start)
+            f.write(zlib.compress(bytes(self.inputs), 9))
+            f.write(FOOTER.pack(len(self.inputs), state.player.score, state.player.lives,
+                                state_checksum(state)))
+
+
+class Replay:
+    def __init__(self, seed, start, inputs, ticks, score, lives, checksum):
+        self.seed = seed
+        self.start = start
+        self.inputs = inputs
+        self.ticks = ticks
+        self.score = score
+        self.lives = lives
+        self.checksum = checksum
+
+    def new_state(self):
+        return state_from_dict(self.start, seed=self.seed)
+
+
+def load_replay(path):
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, seed, start_length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a Space Dodge replay")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported replay version {version}")
+    offset = HEADER.size
+    start = json.loads(data[offset:offset + start_length])
+    offset += start_length
+    inputs = zlib.decompress(data[offset:len(data) - FOOTER.size])
+    ticks, score, lives, checksum = FOOTER.unpack_from(data, len(data) - FOOTER.size)
+    if ticks != len(inputs):
+        raise ValueError(f"{path} is truncated: {len(inputs)} of {ticks} ticks")
+    return Replay(seed, start, inputs, ticks, score, lives, checksum)
+
+
+def run_replay(replay):
+    # Step the recorded inputs as fast as possible; returns the final state
+    state = replay.new_state()
+    decoded = DECODED_INPUTS
+    for bits in replay.inputs:
+        step(state, decoded[bits])
+    return state
+
+
+def verify_replay(replay, state):
+    return (
+        state.player.score == replay.score
+        and state.player.lives == replay.lives
+        and state_checksum(state) == replay.checksum
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Replay recorded Space Dodge sessions headless.")
+    parser.add_argument("paths", nargs="+", help="replay files")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.paths:
+        replay = load_replay(path)
+        start = time.perf_counter()
+        state = run_replay(replay)
+        elapsed = time.perf_counter() - start
+        ok = verify_replay(replay, state)
+        failed += not ok
+        print(f"{path}: {replay.ticks} ticks in {elapsed:.3f}s, score {state.player.score}, "
+              f"lives {state.player.lives} -- {'OK' if ok else 'MISMATCH'}")
+    sys.exit(1 if failed else 0)
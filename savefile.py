@@ -0,0 +1,148 @@
+import os
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from simulation import GameState, Player, OBSTACLE_SIZE, state_from_dict, state_to_dict
+from obstacles import ObstacleStore
+
+# Saved games. Two formats are read and written:
+#
+# JSON (.json) -- the original dict layout, one object per obstacle. Files
+#   written before the layout was versioned have no 'version' key; they are
+#   migrated on load.
+#
+# Binary (.sav) -- a fixed header followed by the obstacle columns as packed
+#   little-endian int32 arrays (centers x, centers y, speed), optionally
+#   zlib compressed. Loading hands the columns to the obstacle store in one
+#   bulk copy, so tens of thousands of obstacles load in a few milliseconds.
+#
+#   header: magic, version, flags, player x/y/lives/score, obstacle_timer,
+#           obstacle count, column block size
+
+SCHEMA_VERSION = 1
+
+MAGIC = b"SDSV"
+BINARY_VERSION = 1
+HEADER = struct.Struct("<4sHHiiqqqII")
+FLAG_COMPRESSED = 1
+COMPRESSION_LEVEL = 1  # Saves are mostly about speed; level 1 still halves them
+
+
+def migrate_dict(game_state):
+    # Bring a JSON save dict up to SCHEMA_VERSION
+    if not isinstance(game_state, dict):
+        raise ValueError("save file is corrupt")
+    version = game_state.get('version', 0)
+    if version > SCHEMA_VERSION:
+        raise ValueError(f"save version {version} is newer than this game ({SCHEMA_VERSION})")
+    if version < 1:
+        # Unversioned saves (e.g. saves/test.json) may lack the spawn timer
+        game_state.setdefault('obstacle_timer', 0)
+        game_state['version'] = 1
+    return game_state
+
+
+def state_from_columns(player_data, obstacle_timer, centerx, centery, speed, seed=None):
+    obstacles = ObstacleStore(*OBSTACLE_SIZE, capacity=len(centerx))
+    obstacles.extend(centerx, centery, speed)
+    player = Player(
+        x=player_data['x'],
+        y=player_data['y'],
+        lives=player_data['lives'],
+        score=player_data['score']
+    )
+    return GameState(player, obstacles, obstacle_timer, seed=seed)
+
+
+def write_atomic(path, data):
+    # Write to a temp file next to `path` and rename it into place, so a
+    # crash mid-write never leaves a half-written save behind
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+def save_json(path, state):
+    game_state = state_to_dict(state)
+    game_state['version'] = SCHEMA_VERSION
+    write_atomic(path, json.dumps(game_state).encode())
+
+
+def load_json(path, seed=None):
+    with open(path, 'r') as f:
+        return state_from_dict(migrate_dict(json.load(f)), seed=seed)
+
+
+def encode_binary(state, compress=True):
+    player = state.player
+    n = len(state.obstacles)
+    centerx, centery = state.obstacles.centers()
+    columns = b"".join(
+        np.ascontiguousarray(column, dtype="<i4").tobytes()
+        for column in (centerx, centery, state.obstacles.speed[:n])
+    )
+    flags = 0
+    if compress:
+        columns = zlib.compress(columns, COMPRESSION_LEVEL)
+        flags |= FLAG_COMPRESSED
+    header = HEADER.pack(
+        MAGIC, BINARY_VERSION, flags,
+        player.rect.centerx, player.rect.centery, player.lives, player.score,
+        state.obstacle_timer, n, len(columns)
+    )
+    return header + columns
+
+
+def decode_binary(data, seed=None):
+    # Anything that isn't a readable save raises ValueError
+    if len(data) < HEADER.size:
+        raise ValueError("save file is truncated")
+    (magic, version, flags, x, y, lives, score,
+     obstacle_timer, count, size) = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a Space Dodge save file")
+    if version > BINARY_VERSION:
+        raise ValueError(f"save version {version} is newer than this game ({BINARY_VERSION})")
+    columns = data[HEADER.size:HEADER.size + size]
+    if flags & FLAG_COMPRESSED:
+        try:
+            columns = zlib.decompress(columns)
+        except zlib.error:
+            raise ValueError("save file is corrupt") from None
+    if len(columns) != 3 * 4 * count:
+        raise ValueError("save file is truncated")
+    centerx, centery, speed = np.frombuffer(columns, dtype="<i4").reshape(3, count)
+    player_data = {'x': x, 'y': y, 'lives': lives, 'score': score}
+    return state_from_columns(player_data, obstacle_timer, centerx, centery, speed, seed=seed)
+
+
+def save_binary(path, state, compress=True):
+    write_atomic(path, encode_binary(state, compress))
+
+
+def load_binary(path, seed=None):
+    with open(path, 'rb') as f:
+        return decode_binary(f.read(), seed=seed)
+
+
+def save_game(path, state, compress=True):
+    # The extension picks the format
+    if path.endswith(".json"):
+        save_json(path, state)
+    else:
+        save_binary(path, state, compress)
+
+
+def load_game(path, seed=None):
+    # Sniff the format rather than trusting the extension
+    with open(path, 'rb') as f:
+        magic = f.read(len(MAGIC))
+    if magic == MAGIC:
+        return load_binary(path, seed=seed)
+    return load_json(path, seed=seed)
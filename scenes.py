@@ -0,0 +1,138 @@
+import pygame
+
+# Screen flow as a stack of scenes driven by one loop. The top scene gets
+# the events and is updated and drawn each frame; menus and dialogs are
+# pushed over the screen they belong to and popped when done, and moving
+# on to another screen replaces the scene instead of calling into it, so
+# the Python stack stays flat however many games are played.
+#
+# Menus are idle scenes: instead of redrawing at a fixed frame rate the loop
+# sleeps in pygame.event.wait() until there is input or the scene's next
+# timed change, and only redraws a scene marked dirty. Any input except
+# mouse motion marks the top scene dirty; scenes that react to motion (or
+# animate) set `dirty` themselves.
+
+# Longest an idle scene sleeps without input, so it still gets update()
+# calls now and then
+IDLE_TIMEOUT = 1000  # ms
+
+
+class Scene:
+    fps = 60  # Frame cap while this scene is on top
+    idle = False  # Wait for events and redraw only when dirty
+
+    def __init__(self):
+        self.stack = None  # Set by SceneStack.push
+        self.dirty = True
+
+    def enter(self):
+        # Pushed onto the stack
+        pass
+
+    def exit(self):
+        # Popped off the stack, or the game is quitting
+        pass
+
+    def pause(self):
+        # Another scene was pushed on top of this one
+        pass
+
+    def resume(self):
+        # The scene on top of this one was popped
+        pass
+
+    def timeout(self):
+        # For idle scenes: ms until the next timed change
+        return IDLE_TIMEOUT
+
+    def begin_frame(self):
+        # Start of a frame, before its events are handled
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, dt):
+        # dt is the real time in seconds since the last frame
+        pass
+
+    def draw(self, surface):
+        # Draw and present the frame
+        pass
+
+
+class SceneStack:
+    def __init__(self):
+        self.scenes = []
+
+    @property
+    def top(self):
+        return self.scenes[-1] if self.scenes else None
+
+    def push(self, scene):
+        if self.scenes:
+            self.scenes[-1].pause()
+        scene.stack = self
+        self.scenes.append(scene)
+        scene.enter()
+
+    def pop(self):
+        scene = self.scenes.pop()
+        scene.exit()
+        scene.stack = None
+        if self.scenes:
+            self.scenes[-1].dirty = True
+            self.scenes[-1].resume()
+        return scene
+
+    def replace(self, scene):
+        # Swap the top scene for `scene` without resuming the one below
+        old = self.scenes.pop()
+        old.exit()
+        old.stack = None
+        scene.stack = self
+        self.scenes.append(scene)
+        scene.enter()
+
+    def reset(self, scene):
+        # Drop every scene and start over from `scene`
+        self.clear()
+        self.push(scene)
+
+    def clear(self):
+        while self.scenes:
+            old = self.scenes.pop()
+            old.exit()
+            old.stack = None
+
+    def run(self, surface, clock):
+        # Runs until the stack is empty or the window is closed
+        while self.scenes:
+            scene = self.scenes[-1]
+            if scene.idle:
+                # Sleep until there's input or the scene's next timed change
+                event = pygame.event.wait(max(1, scene.timeout()))
+                events = [] if event.type == pygame.NOEVENT else [event]
+                events.extend(pygame.event.get())
+                dt = clock.tick() / 1000
+            else:
+                dt = clock.tick(scene.fps) / 1000
+                scene.begin_frame()
+                events = pygame.event.get()
+
+            for event in events:
+                if event.type == pygame.QUIT:
+                    self.clear()
+                    return
+                target = self.scenes[-1]
+                target.handle_event(event)
+                if event.type != pygame.MOUSEMOTION:
+                    target.dirty = True
+                if not self.scenes:
+                    return
+
+            scene = self.scenes[-1]
+            scene.update(dt)
+            if self.scenes and self.scenes[-1] is scene and (scene.dirty or not scene.idle):
+                scene.draw(surface)
+                scene.dirty = False
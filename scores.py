@@ -0,0 +1,179 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+
+# High scores and run history in SQLite. Every finished game is a row in
+# `runs`; indexes on score, mode and day make the leaderboards a short index
+# walk however many runs there are. A second table keeps how many runs ended
+# on each score, so the percentile of a run is a sum over distinct scores
+# rather than a count over every run.
+#
+# The game hands finished runs to a ScoreWriter, which writes them on its
+# own thread in batched transactions; nothing on the frame thread waits on
+# the disk. A batch that fails stays pending and is tried again after the
+# next flush interval.
+
+SCORES_FILE = 'scores.db'
+SCHEMA_VERSION = 1
+FLUSH_INTERVAL = 1.0  # Seconds a finished run may wait to be written
+BATCH_SIZE = 256  # Runs that trigger a write straight away
+
+Run = namedtuple("Run", ["score", "frames", "easter_egg", "finished_at"])
+
+
+def run_day(finished_at):
+    return time.strftime('%Y-%m-%d', time.localtime(finished_at))
+
+
+class ScoreStore:
+    def __init__(self, path=SCORES_FILE):
+        self.path = path
+
+    def _connect(self):
+        # A connection per call keeps this usable from the writer thread
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        connection = sqlite3.connect(self.path, timeout=5)
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            connection.executescript(f"""
+                PRAGMA journal_mode = WAL;
+                DROP TABLE IF EXISTS runs;
+                DROP TABLE IF EXISTS score_counts;
+                CREATE TABLE runs (
+                    id INTEGER PRIMARY KEY,
+                    score INTEGER NOT NULL,
+                    frames INTEGER NOT NULL,
+                    easter_egg INTEGER NOT NULL,
+                    day TEXT NOT NULL,
+                    finished_at REAL NOT NULL
+                );
+                CREATE INDEX runs_score ON runs (score);
+                CREATE INDEX runs_mode_score ON runs (easter_egg, score);
+                CREATE INDEX runs_day_score ON runs (day, score);
+                CREATE TABLE score_counts (
+                    easter_egg INTEGER NOT NULL,
+                    score INTEGER NOT NULL,
+                    runs INTEGER NOT NULL,
+                    PRIMARY KEY (easter_egg, score)
+                ) WITHOUT ROWID;
+                PRAGMA user_version = {SCHEMA_VERSION};
+            """)
+        return connection
+
+    def add_runs(self, runs):
+        # Write a batch of Runs in one transaction
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT INTO runs (score, frames, easter_egg, day, finished_at) VALUES (?, ?, ?, ?, ?)",
+                [(run.score, run.frames, int(run.easter_egg), run_day(run.finished_at), run.finished_at)
+                 for run in runs]
+            )
+            connection.executemany(
+                "INSERT INTO score_counts VALUES (?, ?, 1) "
+                "ON CONFLICT (easter_egg, score) DO UPDATE SET runs = runs + 1",
+                [(int(run.easter_egg), run.score) for run in runs]
+            )
+        connection.close()
+
+    def top(self, k, day=None, easter_egg=None):
+        # The k best runs, optionally only from `day` (YYYY-MM-DD) and/or
+        # one mode, best first
+        where = []
+        arguments = []
+        if day is not None:
+            where.append("day = ?")
+            arguments.append(day)
+        if easter_egg is not None:
+            where.append("easter_egg = ?")
+            arguments.append(int(easter_egg))
+        query = "SELECT score, frames, easter_egg, finished_at FROM runs"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY score DESC, id LIMIT ?"
+        connection = self._connect()
+        rows = connection.execute(query, arguments + [k]).fetchall()
+        connection.close()
+        return [Run(score, frames, bool(easter_egg), finished_at)
+                for score, frames, easter_egg, finished_at in rows]
+
+    def percentile(self, score, easter_egg=None):
+        # Percentage of recorded runs (of one mode, if given) that scored
+        # less than `score`; None when there are none
+        query = "SELECT SUM(runs), SUM(CASE WHEN score < ? THEN runs ELSE 0 END) FROM score_counts"
+        arguments = [score]
+        if easter_egg is not None:
+            query += " WHERE easter_egg = ?"
+            arguments.append(int(easter_egg))
+        connection = self._connect()
+        total, below = connection.execute(query, arguments).fetchone()
+        connection.close()
+        if not total:
+            return None
+        return 100.0 * below / total
+
+    def count(self):
+        connection = self._connect()
+        count = connection.execute("SELECT COALESCE(SUM(runs), 0) FROM score_counts").fetchone()[0]
+        connection.close()
+        return count
+
+
+class ScoreWriter:
+    def __init__(self, store, flush_interval=FLUSH_INTERVAL, batch_size=BATCH_SIZE):
+        self.store = store
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.written = 0
+        self.last_error = None
+        self._pending = []
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="scores", daemon=True)
+        self._thread.start()
+
+    def submit(self, run):
+        with self._condition:
+            self._pending.append(run)
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def pending(self):
+        # Runs submitted but not written yet, to show alongside the stored ones
+        with self._condition:
+            return list(self._pending)
+
+    def _run(self):
+        failed = False
+        while True:
+            with self._condition:
+                if not self._closed and (failed or len(self._pending) < self.batch_size):
+                    self._condition.wait(self.flush_interval)
+                batch = list(self._pending)
+                closed = self._closed
+            if batch:
+                try:
+                    self.store.add_runs(batch)
+                except sqlite3.Error as error:
+                    # Keep the batch for the next round
+                    self.last_error = error
+                    failed = True
+                else:
+                    self.written += len(batch)
+                    failed = False
+                    with self._condition:
+                        # Only dropped once written, so a run is never missing
+                        # from both the database and pending()
+                        del self._pending[:len(batch)]
+            if closed:
+                return
+
+    def close(self):
+        # Write what's pending and stop the worker
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
@@ -0,0 +1,281 @@
+# Game rules for Space Dodge, kept free of any window, audio or clock so
+# that games can be stepped as fast as the CPU allows. main.py drives this
+# with real keyboard input and draws the result; soak tests and balance
+# sweeps can drive it directly. Only pygame.Rect is used, which does not
+# need pygame.init(), so this runs fine under SDL's dummy drivers.
+import random
+import struct
+import time
+import zlib
+from collections import namedtuple
+
+import pygame
+
+from obstacles import ObstacleStore
+from waves import LEVELS, WaveSchedule, describe
+
+# Playfield
+WIDTH, HEIGHT = 1000, 800
+TICK_RATE = 60  # Simulation steps per second, independent of the render rate
+
+# Player
+PLAYER_SIZE = (50, 50)
+PLAYER_SPEED = 5
+STARTING_LIVES = 3
+EASTER_EGG_LIVES = 99
+INVULNERABLE_LIVES = 2 ** 31 - 1  # For stress runs and benchmarks
+
+# Obstacles
+OBSTACLE_SIZE = (50, 50)
+OBSTACLE_MIN_SPEED = 3
+OBSTACLE_MAX_SPEED = 7
+
+# Spawn timelines per difficulty level (see waves.py), compiled once
+WAVES = WaveSchedule(LEVELS, TICK_RATE, WIDTH)
+
+# Directional input for a single tick
+Inputs = namedtuple("Inputs", ["left", "right", "up", "down"])
+NO_INPUT = Inputs(False, False, False, False)
+
+
+class Player:
+    def __init__(self, x, y, speed=PLAYER_SPEED, lives=STARTING_LIVES, score=0):
+        self.rect = pygame.Rect((0, 0), PLAYER_SIZE)
+        self.rect.center = (x, y)
+        self.previous = self.rect.topleft  # Position before the last move, for interpolation
+        self.speed = speed
+        self.lives = lives
+        self.score = score
+
+    def move(self, inputs):
+        self.previous = self.rect.topleft
+        if inputs.left and self.rect.left > 0:
+            self.rect.x -= self.speed
+        if inputs.right and self.rect.right < WIDTH:
+            self.rect.x += self.speed
+        if inputs.up and self.rect.top > 0:
+            self.rect.y -= self.speed
+        if inputs.down and self.rect.bottom < HEIGHT:
+            self.rect.y += self.speed
+
+
+class GameState:
+    def __init__(self, player, obstacles=None, obstacle_timer=0, seed=None):
+        self.player = player
+        self.obstacles = obstacles if obstacles is not None else ObstacleStore(*OBSTACLE_SIZE)
+        self.obstacle_timer = obstacle_timer  # Position in the spawn timeline
+        self.waves = WAVES
+        self.rng = random.Random(seed)
+        self.frame = 0
+        self.hits = 0  # Collisions during the last step, for crash sounds
+        self.game_over = False
+
+
+def spawn_obstacle(obstacles, rng):
+    obstacles.spawn(
+        rng.randint(50, WIDTH - 50),
+        -50,
+        rng.randint(OBSTACLE_MIN_SPEED, OBSTACLE_MAX_SPEED)
+    )
+
+
+def new_game(seed=None, easter_egg_activated=False):
+    player = Player(WIDTH // 2, HEIGHT - 60)
+    if easter_egg_activated:
+        player.lives = EASTER_EGG_LIVES  # Easter egg effect: give the player 99 lives
+    return GameState(player, seed=seed)
+
+
+def state_from_dict(game_state, seed=None):
+    # Rebuild a game from the dict layout used by the save files
+    player_data = game_state['player']
+    player = Player(
+        x=player_data['x'],
+        y=player_data['y'],
+        lives=player_data['lives'],
+        score=player_data['score']
+    )
+    obstacles = ObstacleStore(*OBSTACLE_SIZE, capacity=len(game_state['obstacles']))
+    obstacles.extend(
+        [obs_data['x'] for obs_data in game_state['obstacles']],
+        [obs_data['y'] for obs_data in game_state['obstacles']],
+        [obs_data['speed'] for obs_data in game_state['obstacles']]
+    )
+    return GameState(player, obstacles, game_state.get('obstacle_timer', 0), seed=seed)
+
+
+def state_to_dict(state):
+    player = state.player
+    centerx, centery = state.obstacles.centers()
+    return {
+        'player': {
+            'x': player.rect.centerx,
+            'y': player.rect.centery,
+            'lives': player.lives,
+            'score': player.score
+        },
+        'obstacles': [
+            {
+                'x': x,
+                'y': y,
+                'speed': speed
+            } for x, y, speed in zip(
+                centerx.tolist(), centery.tolist(),
+                state.obstacles.speed[:len(state.obstacles)].tolist()
+            )
+        ],
+        'obstacle_timer': state.obstacle_timer
+    }
+
+
+def copy_state(state):
+    # A snapshot sharing nothing with `state`, e.g. to save from another thread
+    player = state.player
+    copy = GameState(
+        Player(player.rect.centerx, player.rect.centery, player.speed, player.lives, player.score),
+        state.obstacles.copy(),
+        state.obstacle_timer
+    )
+    copy.rng.setstate(state.rng.getstate())
+    copy.waves = state.waves
+    copy.frame = state.frame
+    copy.game_over = state.game_over
+    return copy
+
+
+def state_checksum(state):
+    # CRC of everything that decides how the game plays out from here
+    player = state.player
+    n = len(state.obstacles)
+    checksum = zlib.crc32(struct.pack(
+        "<qqqiiq", state.frame, player.score, player.lives,
+        player.rect.x, player.rect.y, state.obstacle_timer
+    ))
+    for column in (state.obstacles.x, state.obstacles.y, state.obstacles.speed):
+        checksum = zlib.crc32(column[:n].tobytes(), checksum)
+    return checksum
+
+
+def step(state, inputs, profiler=None):
+    # Advance the game by one tick (1 / TICK_RATE seconds). The state is
+    # updated in place and returned so callers can write
+    # `state = step(state, inputs)`. An optional profiler gets a mark()
+    # after each phase.
+    if state.game_over:
+        return state
+
+    state.frame += 1
+    state.obstacle_timer += 1
+    state.hits = 0
+
+    # Spawn whatever the wave timeline for the player's score has due
+    timeline = state.waves.timeline(state.player.score)
+    if state.obstacle_timer >= timeline.length:
+        state.obstacle_timer = 0
+    timeline.spawn(state.obstacle_timer, state.obstacles, state.rng, spawn_obstacle)
+    if profiler is not None:
+        profiler.mark("spawn")
+
+    # Move obstacles, dropping the ones that passed by
+    player = state.player
+    obstacles = state.obstacles
+    obstacles.move()
+    player.score += obstacles.cull(HEIGHT)  # Increase score when an obstacle passes by
+    if profiler is not None:
+        profiler.mark("obstacles")
+
+    # Drop the ones that hit the player
+    state.hits = obstacles.collide(player.rect)
+    obstacles.compact()
+    if profiler is not None:
+        profiler.mark("collision")
+    if state.hits:
+        player.lives = max(0, player.lives - state.hits)
+        if player.lives == 0:
+            state.game_over = True
+            return state
+
+    # Move the player
+    player.move(inputs)
+    if profiler is not None:
+        profiler.mark("player")
+    return state
+
+
+def random_inputs(rng):
+    return Inputs(*(rng.random() < 0.5 for _ in range(4)))
+
+
+def run_headless(frames, seed=None, lives=STARTING_LIVES, restart=True):
+    # Step games back to back with random inputs and no frame cap.
+    # Returns (frames stepped, games played, seconds elapsed).
+    input_rng = random.Random(seed)
+    state = new_game(seed=seed)
+    state.player.lives = lives
+    games = 1
+    stepped = 0
+    start = time.perf_counter()
+    while stepped < frames:
+        state = step(state, random_inputs(input_rng))
+        stepped += 1
+        if state.game_over:
+            if not restart:
+                break
+            state = new_game(seed=input_rng.randrange(2 ** 32))
+            state.player.lives = lives
+            games += 1
+    return stepped, games, time.perf_counter() - start
+
+
+def fill_obstacles(state, count, rng):
+    # Top the field up to `count` obstacles scattered over the screen
+    missing = count - len(state.obstacles)
+    if missing > 0:
+        state.obstacles.extend(
+            [rng.randint(50, WIDTH - 50) for _ in range(missing)],
+            [rng.randint(-50, HEIGHT) for _ in range(missing)],
+            [rng.randint(OBSTACLE_MIN_SPEED, OBSTACLE_MAX_SPEED) for _ in range(missing)]
+        )
+
+
+def run_stress(frames, count, seed=None):
+    # Keep `count` obstacles alive on screen every frame and time each step.
+    # The player can't die, so every frame does the full move/cull/collide.
+    # Returns the per-frame step times in seconds.
+    rng = random.Random(seed)
+    state = new_game(seed=seed)
+    state.player.lives = INVULNERABLE_LIVES
+    frame_times = []
+    for _ in range(frames):
+        fill_obstacles(state, count, rng)
+        inputs = random_inputs(rng)
+        start = time.perf_counter()
+        step(state, inputs)
+        frame_times.append(time.perf_counter() - start)
+    return frame_times
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run Space Dodge headless, uncapped.")
+    parser.add_argument("--frames", type=int, default=100000, help="frames to simulate")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    parser.add_argument("--lives", type=int, default=STARTING_LIVES, help="lives per game")
+    parser.add_argument("--stress", type=int, default=0, metavar="N",
+                        help="keep N obstacles alive and report per-frame step times")
+    parser.add_argument("--waves", action="store_true", help="print the spawn rate of each difficulty level")
+    args = parser.parse_args()
+
+    if args.waves:
+        print(describe(WAVES, TICK_RATE))
+    elif args.stress:
+        frame_times = sorted(run_stress(args.frames, args.stress, seed=args.seed))
+        p50 = frame_times[len(frame_times) // 2] * 1000
+        p99 = frame_times[int(len(frame_times) * 0.99)] * 1000
+        print(f"{args.stress} obstacles, {len(frame_times)} frames: "
+              f"p50 {p50:.3f}ms, p99 {p99:.3f}ms, max {frame_times[-1] * 1000:.3f}ms")
+    else:
+        frames, games, elapsed = run_headless(args.frames, seed=args.seed, lives=args.lives)
+        print(f"{frames} frames, {games} games in {elapsed:.3f}s "
+              f"({frames / elapsed:.0f} frames/sec)")
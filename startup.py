@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+import pygame
+
+# Helpers for getting the start screen up quickly: per-stage startup
+# timing, font lookups cached across runs, and a background thread for
+# assets that aren't needed until gameplay.
+
+FONT_CACHE_FILE = 'font_cache.json'
+
+
+class StartupTimer:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, begin, time.perf_counter())
+
+    def add(self, name, begin, end):
+        with self._lock:
+            self.stages.append((name, begin - self.start, end - begin, threading.current_thread().name))
+
+    def mark(self, name):
+        # A milestone with no duration, e.g. "first frame"
+        now = time.perf_counter()
+        self.add(name, now, now)
+
+    def report(self):
+        with self._lock:
+            stages = sorted(self.stages, key=lambda stage: stage[1])
+        lines = ["Startup timing (ms since main.py started):"]
+        for name, offset, duration, thread in stages:
+            lines.append(f"  {name:<22} at {offset * 1000:8.1f}  took {duration * 1000:8.1f}  [{thread}]")
+        return "\n".join(lines)
+
+
+def font_paths(names, cache_file=FONT_CACHE_FILE):
+    # {name: font file or None for pygame's default font}. Looking a font up
+    # can mean scanning every system font (fc-list), so results are kept in
+    # `cache_file` and only looked up again if the file goes missing. Fonts
+    # that weren't found aren't cached, so one installed later is picked up.
+    try:
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    paths = {}
+    changed = False
+    for name in names:
+        path = cache.get(name)
+        if path is None or not os.path.exists(path):
+            path = pygame.font.match_font(name)
+            if path is not None:
+                cache[name] = path
+            else:
+                cache.pop(name, None)
+            changed = True
+        paths[name] = path
+
+    if changed:
+        try:
+            with open(cache_file, 'w') as f:
+                json.dump(cache, f)
+        except OSError:
+            pass  # Just slower next time
+    return paths
+
+
+class BackgroundLoader:
+    # Runs (name, function) jobs in order on a daemon thread. Results are
+    # collected with result(name); an exception from a job is re-raised
+    # there, on the caller's thread.
+    def __init__(self, jobs, timer=None):
+        self.jobs = jobs
+        self.timer = timer
+        self.completed = 0
+        self._results = {}
+        self._errors = {}
+        self._thread = threading.Thread(target=self._run, name="loader", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for name, job in self.jobs:
+            begin = time.perf_counter()
+            try:
+                self._results[name] = job()
+            except Exception as error:
+                self._errors[name] = error
+            if self.timer is not None:
+                self.timer.add(name, begin, time.perf_counter())
+            self.completed += 1
+
+    @property
+    def total(self):
+        return len(self.jobs)
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        self._thread.join(timeout)
+        return self.done
+
+    def result(self, name):
+        self.wait()
+        if name in self._errors:
+            raise self._errors[name]
+        return self._results[name]
@@ -0,0 +1,46 @@
+import time
+
+# Fixed-timestep pacing. The simulation always advances in steps of exactly
+# 1 / tick_rate seconds, however fast or slow frames are rendered: each
+# frame adds the real time elapsed to an accumulator and runs as many whole
+# ticks as fit. What's left over (alpha, 0..1) is how far the render sits
+# between the last two ticks, for interpolating positions.
+
+# Longest stretch of real time simulated in one frame. After a longer stall
+# (window drag, breakpoint) the game drops the time rather than fast-
+# forwarding through it.
+MAX_FRAME_TIME = 0.25
+
+
+class FixedTimestep:
+    def __init__(self, tick_rate, max_frame_time=MAX_FRAME_TIME, clock=time.perf_counter):
+        self.dt = 1.0 / tick_rate
+        self.max_frame_time = max_frame_time
+        self.clock = clock
+        self.accumulator = 0.0
+        self.ticks = 0
+        self._last = None
+
+    def reset(self):
+        # Forget the time spent away from the game loop (pause menu etc.)
+        self.accumulator = 0.0
+        self._last = None
+
+    def advance(self):
+        # Returns how many ticks to simulate this frame
+        now = self.clock()
+        if self._last is None:
+            self._last = now
+            # Always simulate the first frame so there's something to draw
+            self.accumulator = self.dt
+        elapsed = min(now - self._last, self.max_frame_time)
+        self._last = now
+        self.accumulator += elapsed
+        ticks = int(self.accumulator / self.dt)
+        self.accumulator -= ticks * self.dt
+        self.ticks += ticks
+        return ticks
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
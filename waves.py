@@ -0,0 +1,142 @@
+import bisect
+from collections import namedtuple
+
+import numpy as np
+
+# Obstacle spawning from precomputed wave timelines. Difficulty levels are
+# keyed to the player's score; each level is a list of waves that is
+# compiled once, at import, into a per-tick timeline: how many random
+# obstacles to spawn on that tick, and a slice of fixed-pattern obstacles
+# (lines, V formations, walls with a gap) to add in one bulk extend. The
+# timeline loops, and stepping through it is a list lookup per tick however
+# dense the waves get.
+#
+# state.obstacle_timer is the position in the current level's timeline.
+# Level 0 spawns one random obstacle every second at position 0, exactly
+# like the fixed interval it replaces, so old saves resume where they were.
+
+SPAWN_Y = -50  # Center height new obstacles start at, just above the screen
+PATTERN_SPACING = 60  # Pixels between obstacles in a formation
+
+# One stretch of a level. Random obstacles arrive at `start_rate` per second,
+# ramping linearly to `end_rate` by the end of the wave; every `burst_every`
+# seconds (0 = never) a `burst` formation of `burst_size` obstacles moving at
+# `burst_speed` is added.
+Wave = namedtuple("Wave", [
+    "seconds", "start_rate", "end_rate", "burst_every", "burst", "burst_size", "burst_speed"
+])
+
+# (minimum score, waves) per difficulty level, easiest first
+LEVELS = [
+    (0, [Wave(1, 1, 1, 0, None, 0, 0)]),
+    (20, [
+        Wave(15, 1, 2, 5, "line", 4, 4),
+        Wave(5, 2, 2, 0, None, 0, 0),
+    ]),
+    (50, [
+        Wave(12, 2, 3, 4, "vee", 5, 5),
+        Wave(8, 1, 1, 2, "line", 6, 4),
+    ]),
+    (100, [
+        Wave(10, 3, 4, 5, "wall", 16, 4),
+        Wave(10, 3, 3, 3, "vee", 7, 6),
+    ]),
+    (200, [
+        Wave(10, 4, 6, 3, "wall", 17, 5),
+        Wave(5, 8, 8, 1, "vee", 7, 7),
+        Wave(5, 2, 2, 0, None, 0, 0),
+    ]),
+]
+
+
+def pattern(name, count, number, width):
+    # Center offsets (x, y) of a `count`-obstacle formation. `number` counts
+    # the bursts so far in the level and varies where the formation lands.
+    spread = PATTERN_SPACING * (count - 1)
+    # Spread formations over the screen along the golden ratio sequence
+    room = max(width - 100 - spread, 0)
+    left = 50 + int((number * 0.618034 % 1) * room)
+    if name == "line":
+        return [(left + i * PATTERN_SPACING, 0) for i in range(count)]
+    if name == "vee":
+        middle = (count - 1) / 2
+        return [(left + i * PATTERN_SPACING, -int(abs(i - middle) * PATTERN_SPACING))
+                for i in range(count)]
+    if name == "wall":
+        # A full row with a two-obstacle gap to fly through
+        slots = (width - 100) // PATTERN_SPACING + 1
+        gap = int((number * 0.618034 % 1) * (slots - 1))
+        columns = [i for i in range(slots) if i not in (gap, gap + 1)][:count]
+        return [(50 + i * PATTERN_SPACING, 0) for i in columns]
+    raise ValueError(f"unknown spawn pattern {name!r}")
+
+
+class Timeline:
+    def __init__(self, waves, tick_rate, width):
+        random_counts = []
+        offsets = [0]
+        xs, ys, speeds = [], [], []
+        bursts = 0
+        for wave in waves:
+            ticks = int(wave.seconds * tick_rate)
+            # Spawns due by the start of each tick, from the integral of the
+            # ramping rate; rounding keeps 1/60-sized steps from drifting
+            t = np.arange(ticks + 1) / tick_rate
+            ramp = (wave.end_rate - wave.start_rate) / wave.seconds
+            due = np.ceil(np.round(wave.start_rate * t + ramp * t * t / 2, 6)).astype(np.int64)
+            random_counts.extend(np.diff(due).tolist())
+
+            burst_interval = int(wave.burst_every * tick_rate)
+            for tick in range(ticks):
+                if burst_interval and tick % burst_interval == 0:
+                    for x, y in pattern(wave.burst, wave.burst_size, bursts, width):
+                        xs.append(x)
+                        ys.append(SPAWN_Y + y)
+                        speeds.append(wave.burst_speed)
+                    bursts += 1
+                offsets.append(len(xs))
+
+        self.length = len(random_counts)
+        self.random_counts = random_counts
+        self.offsets = offsets
+        self.x = np.array(xs, dtype=np.int32)
+        self.y = np.array(ys, dtype=np.int32)
+        self.speed = np.array(speeds, dtype=np.int32)
+
+    def spawn(self, position, obstacles, rng, spawn_random):
+        # Add everything due at `position`; random obstacles come from
+        # spawn_random(obstacles, rng) so they use the game's RNG
+        count = self.random_counts[position]
+        if count:
+            for _ in range(count):
+                spawn_random(obstacles, rng)
+        offsets = self.offsets
+        if offsets[position + 1] > offsets[position]:
+            start, end = offsets[position], offsets[position + 1]
+            obstacles.extend(self.x[start:end], self.y[start:end], self.speed[start:end])
+
+
+class WaveSchedule:
+    def __init__(self, levels, tick_rate, width):
+        self.thresholds = [score for score, _ in levels]
+        self.timelines = [Timeline(waves, tick_rate, width) for _, waves in levels]
+
+    def level(self, score):
+        return max(bisect.bisect_right(self.thresholds, score) - 1, 0)
+
+    def timeline(self, score):
+        return self.timelines[self.level(score)]
+
+
+def spawns_per_second(timeline, tick_rate):
+    # Average spawn rate over a whole timeline, for balancing
+    total = sum(timeline.random_counts) + len(timeline.x)
+    return total * tick_rate / max(timeline.length, 1)
+
+
+def describe(schedule, tick_rate):
+    lines = []
+    for score, timeline in zip(schedule.thresholds, schedule.timelines):
+        lines.append(f"score {score:>5}+  {timeline.length / tick_rate:6.1f}s loop  "
+                     f"{spawns_per_second(timeline, tick_rate):5.2f} spawns/s")
+    return "\n".join(lines)